@@ -0,0 +1,169 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+import moo_functions
+from moo_functions import ParetoArchive, crowding_distances
+from nondominated_sort import non_dominated_sort
+import nsga2
+import spea2
+import sms_emoa
+import moead
+
+ALGORITHMS = ("nsga2", "spea2", "sms_emoa", "moead")
+
+
+def run_algorithm(algorithm, wardrobe, generations, population=None, pareto_archive=None, rng=None, kwargs=None):
+    """
+    Runs `generations` generations of one in-repo algorithm, without a progress bar.
+    wardrobe: (num_tops, num_bottoms, all_clothes_list)
+    population: optional initial population
+    rng: numpy Generator or seed passed to the algorithm
+    kwargs: further arguments for its run() (MOEAD(), plus mode); SPEA2's population_size defaults to 100
+    and its archive_size to population_size, like the other algorithms' population sizes
+    returns: final population and objectives
+    """
+    kwargs = dict(kwargs or {}, rng=rng)
+    num_tops, num_bottoms, all_clothes_list = wardrobe
+    n_bits = num_tops + num_bottoms
+    common = dict(pareto_archive=pareto_archive, initial_population=population)
+
+    if algorithm == "nsga2":
+        return nsga2.run(
+            moo_functions.evaluate_solution_metrics, num_tops, num_bottoms, all_clothes_list, n_bits,
+            generations=generations, progress=False, **common, **kwargs
+        )
+    if algorithm == "spea2":
+        kwargs.setdefault("population_size", 100)
+        kwargs.setdefault("archive_size", kwargs["population_size"])
+        return spea2.run(
+            n_bits, num_tops, num_bottoms, all_clothes_list, generations=generations, progress=False, **common, **kwargs
+        )
+    if algorithm == "sms_emoa":
+        return sms_emoa.run(
+            n_bits, num_tops, num_bottoms, all_clothes_list, generations=generations, progress=False, **common, **kwargs
+        )
+    if algorithm == "moead":
+        mode = kwargs.pop("mode", "sequential")
+        kwargs.setdefault("n_objectives", 3 + len(kwargs.get("occasions") or []))
+        return moead.MOEAD(
+            n_bits, num_tops=num_tops, num_bottoms=num_bottoms, all_clothes_list=all_clothes_list,
+            max_generations=generations, **common, **kwargs
+        ).run(mode, progress=False)
+    raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {ALGORITHMS}")
+
+
+def _run_island(algorithm, wardrobe, generations, population, rng, kwargs):
+    # one epoch of one island; rng is the island's Generator, returned (advanced) so that the next epoch
+    # continues the same stream
+    archive = ParetoArchive()
+    population, objectives = run_algorithm(algorithm, wardrobe, generations, population, archive, rng, kwargs)
+    return np.asarray(population), np.asarray(objectives), archive.solutions, archive.objectives, rng
+
+
+def elite_order(objectives):
+    """
+    Orders individuals best first: by non-domination rank, then by decreasing crowding distance.
+    returns: (N,) array of indices
+    """
+    objectives = np.asarray(objectives)
+    fronts, ranks = non_dominated_sort(objectives)
+    crowding = np.zeros(len(objectives))
+    for front in fronts:
+        crowding[front] = crowding_distances(objectives[front])
+    return np.lexsort((-crowding, ranks))
+
+
+def migrate(populations, objectives, n_migrants, topology="ring"):
+    """
+    Synchronous migration: every island sends its n_migrants best individuals (elite_order), and each
+    island replaces its n_migrants worst ones with the best n_migrants it receives.
+    topology: "ring" (island i receives from island i - 1) or "full" (every island receives from all others)
+    returns: list of new populations
+    """
+    orders = [elite_order(F) for F in objectives]
+    elites = [(X[order[:n_migrants]], F[order[:n_migrants]]) for X, F, order in zip(populations, objectives, orders)]
+
+    K = len(populations)
+    migrated = []
+    for dest in range(K):
+        if topology == "ring":
+            sources = [(dest - 1) % K]
+        elif topology == "full":
+            sources = [s for s in range(K) if s != dest]
+        else:
+            raise ValueError(f"unknown topology {topology!r}")
+
+        incoming = np.concatenate([elites[s][0] for s in sources])
+        incoming_objectives = np.concatenate([elites[s][1] for s in sources])
+        incoming = incoming[elite_order(incoming_objectives)[:n_migrants]]
+
+        population = populations[dest].copy()
+        population[orders[dest][::-1][:len(incoming)]] = incoming
+        migrated.append(population)
+    return migrated
+
+
+def run(
+    algorithm,
+    num_tops,
+    num_bottoms,
+    all_clothes_list,
+    n_islands=4,
+    generations=100,
+    migration_interval=10,
+    n_migrants=5,
+    topology="ring",
+    seed=None,
+    max_workers=None,
+    pareto_archive=None,
+    progress=True,
+    **algorithm_kwargs
+):
+    """
+    Island model: n_islands independent runs of one in-repo algorithm, one process each, that exchange
+    n_migrants elite individuals every migration_interval generations.
+
+    Islands run epoch by epoch: every island runs migration_interval generations from its current population,
+    the islands migrate, and the next epoch starts from the migrated populations (re-evaluated on entry).
+    Each island draws from its own stream, spawned from one SeedSequence(seed), and keeps it across epochs.
+
+    algorithm: "nsga2", "spea2", "sms_emoa" or "moead"; algorithm_kwargs go to its run() (MOEAD(), plus mode)
+    topology: "ring" or "full" (see migrate)
+    max_workers: process count, n_islands by default
+    pareto_archive: optional moo_functions.ParetoArchive that every island's non-dominated finds are merged into
+    progress: show a progress bar over the islands' generations (the islands themselves never show one)
+    returns: combined non-dominated solutions of all islands and their objective tuples
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {ALGORITHMS}")
+    if pareto_archive is None:
+        pareto_archive = ParetoArchive()
+
+    wardrobe = (num_tops, num_bottoms, all_clothes_list)
+    rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n_islands)]
+    populations = [None] * n_islands
+
+    with ProcessPoolExecutor(max_workers=max_workers or n_islands) as pool:
+        with tqdm(total=generations, desc="Processing items", disable=not progress) as pbar:
+            done = 0
+            while done < generations:
+                epoch = min(migration_interval, generations - done)
+                futures = [
+                    pool.submit(_run_island, algorithm, wardrobe, epoch, populations[i], rngs[i], algorithm_kwargs)
+                    for i in range(n_islands)
+                ]
+                results = [future.result() for future in futures]
+
+                populations = [result[0] for result in results]
+                objectives = [result[1] for result in results]
+                rngs = [result[4] for result in results]
+                for _, _, solutions, archive_objectives, _ in results:
+                    if solutions is not None:
+                        pareto_archive.add_many(solutions, archive_objectives)
+
+                done += epoch
+                if done < generations and n_islands > 1 and n_migrants > 0:
+                    populations = migrate(populations, objectives, n_migrants, topology)
+                pbar.update(epoch)
+
+    return pareto_archive.solutions, [tuple(objs) for objs in pareto_archive.objectives.tolist()]
@@ -1,7 +1,8 @@
 import numpy as np
-import random
-from tqdm import tqdm
-from moo_functions import evaluate_solution_metrics
+from moo_functions import population_evaluator
+from weights import decomposition
+from stopping import CountingEvaluator, generation_range, run_until
+from population import as_generator, seeded_population, one_point_crossover, bit_flip_mutation
 
 class MOEAD:
     def __init__(
@@ -15,93 +16,168 @@ class MOEAD:
         neighborhood_size=20,
         crossover_prob=0.9,
         mutation_prob=0.01,
-        max_generations=200
+        max_generations=200,
+        pareto_archive=None,
+        cache=None,
+        weight_method="das-dennis",
+        weights_cache_dir=None,
+        initial_population=None,
+        profiler=None,
+        rng=None,
+        occasions=None,
+        min_outfits=None
     ):
+        # pareto_archive: optional moo_functions.ParetoArchive that every evaluated solution is fed into
+        # cache: optional moo_functions.EvaluationCache
+        # neighborhood_size: T, capped at population_size
+        # weight_method: "das-dennis", "uniform" or "random" (see weights.simplex_weights); the default used to be
+        # random weights, pass weight_method="random" to get the previous behaviour
+        # weights_cache_dir: optional directory where weight / neighbor tables are cached by (N, M, T)
+        # initial_population: optional individuals to start from, in subproblem order (topped up at random to N)
+        # profiler: optional profiling.Profiler collecting phase timings and a per-generation trace
+        # rng: numpy Generator or seed for this run (None draws the seed from the global np.random state)
+        # occasions: optional occasion columns whose outfits lost become extra objectives (n_objectives = 3 + their number)
+        # min_outfits: optional {occasion column (None for the base case): minimum outfits} constraints
         self.n_vars = n_vars
         self.M = n_objectives
         self.num_tops = num_tops
         self.num_bottoms = num_bottoms
         self.all_clothes_list = all_clothes_list
         self.N = population_size
-        self.T = neighborhood_size
+        self.T = min(neighborhood_size, population_size)
         self.pc = crossover_prob
         self.pm = mutation_prob
         self.max_gen = max_generations
+        self.pareto_archive = pareto_archive
+        self.rng = as_generator(rng)
+        self._evaluate = CountingEvaluator(
+            population_evaluator(num_tops, num_bottoms, all_clothes_list, cache, pareto_archive, occasions, min_outfits),
+            profiler
+        )
+        self.profiler = self._evaluate.profiler
 
-        # Weight vectors
-        self.weights = self._generate_weights()
-
-        # Neighborhoods
-        self.neighbors = self._compute_neighbors()
+        # Weight vectors and neighborhoods
+        self.weights, self.neighbors = decomposition(
+            self.N, self.M, self.T, weight_method, weights_cache_dir, self.rng
+        )
 
         # Population
-        self.population = self._init_population()
-        self.objectives = np.array(
-            [evaluate_solution_metrics(ind, num_tops, num_bottoms, all_clothes_list) for ind in self.population]
-        )
+        self.population = self._init_population(initial_population)
+        self.objectives = self._evaluate(self.population)
 
         # Ideal point
         self.z = np.min(self.objectives, axis=0)
         #self.z = np.zeros(3)
 
 
-    def _generate_weights(self):
-        weights = np.random.rand(self.N, self.M)
-        weights /= np.sum(weights, axis=1, keepdims=True)
-        return weights
-
-    def _compute_neighbors(self):
-        dist = np.linalg.norm(
-            self.weights[:, None, :] - self.weights[None, :, :], axis=2
-        )
-        return np.argsort(dist, axis=1)[:, :self.T]
-
-    def _init_population(self):
-        return np.random.randint(0, 2, size=(self.N, self.n_vars))
+    def _init_population(self, initial_population=None):
+        return seeded_population(initial_population, self.N, self.n_vars, self.rng)
 
     
     def _crossover(self, p1, p2):
-        if random.random() > self.pc:
+        if self.rng.random() > self.pc:
             return p1.copy()
 
-        point = random.randint(1, self.n_vars - 1)
+        point = self.rng.integers(1, self.n_vars)
         return np.concatenate([p1[:point], p2[point:]])
 
     def _mutation(self, child):
-        for i in range(self.n_vars):
-            if random.random() < self.pm:
-                child[i] ^= 1
-        return child
+        return bit_flip_mutation(child, self.pm, self.rng)
 
     # Decomposition function
     def _tchebycheff(self, f, weight):
         return np.max(weight * np.abs(f - self.z))
 
-    # Main loop
-    def run(self):
-        with tqdm(total=self.max_gen, desc="Processing items") as pbar:
-            for gen in range(self.max_gen):
-                for i in range(self.N):
-                    # Select parents from neighborhood
-                    p_idx = np.random.choice(self.neighbors[i], size=2, replace=False)
-                    p1, p2 = self.population[p_idx[0]], self.population[p_idx[1]]
-    
-                    # Generate offspring
-                    child = self._mutation(self._crossover(p1, p2))
-                    f_child = np.array(evaluate_solution_metrics(child, self.num_tops, self.num_bottoms, self.all_clothes_list))
-    
-                    # Update ideal point
-                    self.z = np.minimum(self.z, f_child)
-    
-                    # Update neighbors
-                    for j in self.neighbors[i]:
-                        f_j = self.objectives[j]
-                        if (
-                            self._tchebycheff(f_child, self.weights[j])
-                            <= self._tchebycheff(f_j, self.weights[j])
-                        ):
-                            self.population[j] = child.copy()
-                            self.objectives[j] = f_child.copy()
-                pbar.update(1)
+    def _tchebycheff_many(self, F, W):
+        # Tchebycheff scores of objective rows F under the matching weight rows W (broadcasts over leading axes)
+        return np.max(W * np.abs(F - self.z), axis=-1)
+
+    def _sequential_generation(self):
+        for i in range(self.N):
+            # Select parents from neighborhood
+            with self.profiler.phase("select"):
+                p_idx = self.rng.choice(self.neighbors[i], size=2, replace=False)
+                p1, p2 = self.population[p_idx[0]], self.population[p_idx[1]]
 
+            # Generate offspring
+            with self.profiler.phase("vary"):
+                child = self._mutation(self._crossover(p1, p2))
+            f_child = self._evaluate(child[None, :])[0]
+
+            # Update ideal point
+            self.z = np.minimum(self.z, f_child)
+
+            # Update neighbors
+            with self.profiler.phase("replace"):
+                for j in self.neighbors[i]:
+                    f_j = self.objectives[j]
+                    if (
+                        self._tchebycheff(f_child, self.weights[j])
+                        <= self._tchebycheff(f_j, self.weights[j])
+                    ):
+                        self.population[j] = child.copy()
+                        self.objectives[j] = f_child.copy()
+
+    def _batched_generation(self):
+        # Select two distinct parents from every neighborhood at once
+        with self.profiler.phase("select"):
+            rows = np.arange(self.N)
+            a = self.rng.integers(0, self.T, size=self.N)
+            b = self.rng.integers(0, self.T - 1, size=self.N)
+            b += b >= a
+            p1 = self.population[self.neighbors[rows, a]]
+            p2 = self.population[self.neighbors[rows, b]]
+
+        # Generate and evaluate all N offspring as one matrix
+        with self.profiler.phase("vary"):
+            children = np.where((self.rng.random(self.N) <= self.pc)[:, None], one_point_crossover(p1, p2, self.rng), p1)
+            children = self._mutation(children)
+        f_children = self._evaluate(children)
+
+        # Update ideal point
+        self.z = np.minimum(self.z, f_children.min(axis=0))
+
+        with self.profiler.phase("replace"):
+            self._replace_batched(children, f_children)
+
+    def _replace_batched(self, children, f_children):
+        # Score offspring i on each subproblem j in its neighborhood, (N, T), against the current incumbents
+        child_scores = self._tchebycheff_many(f_children[:, None, :], self.weights[self.neighbors])
+        incumbent_scores = self._tchebycheff_many(self.objectives, self.weights)
+        offspring, slot = np.nonzero(child_scores <= incumbent_scores[self.neighbors])
+        if offspring.size == 0:
+            return
+
+        # Conflicts: a subproblem claimed by several offspring takes the best-scoring one (lowest i on ties)
+        targets = self.neighbors[offspring, slot]
+        order = np.lexsort((offspring, child_scores[offspring, slot], targets))
+        targets, offspring = targets[order], offspring[order]
+        first = np.flatnonzero(np.r_[True, targets[1:] != targets[:-1]])
+        self.population[targets[first]] = children[offspring[first]]
+        self.objectives[targets[first]] = f_children[offspring[first]]
+
+    # Generation by generation
+    def iterate(self, mode="sequential"):
+        # mode: "sequential" (classic MOEA/D: each subproblem breeds and updates its neighbors in turn) or
+        # "batched" (synchronous: all N offspring are bred from the same population and evaluated together,
+        # then every neighborhood is updated in one vectorized step)
+        # yields: a stopping.Snapshot of the initial population, then one after every generation
+        # (max_generations=None runs until the caller stops iterating)
+        if mode == "sequential":
+            generation = self._sequential_generation
+        elif mode == "batched":
+            generation = self._batched_generation
+        else:
+            raise ValueError(f"unknown mode {mode!r}")
+
+        yield self._evaluate.snapshot(0, self.population.copy(), self.objectives.copy())
+        for gen in generation_range(self.max_gen):
+            generation()
+            yield self._evaluate.snapshot(gen, self.population.copy(), self.objectives.copy())
+
+    # Main loop
+    def run(self, mode="sequential", stopping=None, progress=True):
+        # stopping: optional stopping criterion or list of criteria (see stopping.py), checked every generation
+        # progress: show the progress bar
+        run_until(self.iterate(mode), self.max_gen, stopping, progress)
         return self.population, self.objectives
@@ -0,0 +1,97 @@
+import numpy as np
+from moo_functions import Staircase
+
+
+def dominance_matrix(objectives):
+    """
+    objectives: (N, M) array or list of objective tuples (minimization)
+    returns: (N, N) boolean matrix, D[i, j] is True if solution i dominates solution j
+    """
+    F = np.asarray(objectives)
+    return (
+        np.all(F[:, None, :] <= F[None, :, :], axis=2) &
+        np.any(F[:, None, :] < F[None, :, :], axis=2)
+    )
+
+
+def _fronts_from_ranks(ranks):
+    return [np.flatnonzero(ranks == r).tolist() for r in range(ranks.max() + 1)] if len(ranks) else []
+
+
+def sort_by_dominance_matrix(objectives):
+    """
+    Peels fronts off a vectorized dominance matrix: O(M N^2) work, all of it in NumPy.
+    returns: (fronts, ranks), fronts as lists of indices and ranks as an (N,) int array
+    """
+    D = dominance_matrix(objectives)
+    n_dominators = D.sum(axis=0)
+    ranks = np.full(len(D), -1)
+
+    front = np.flatnonzero(n_dominators == 0)
+    rank = 0
+    while front.size:
+        ranks[front] = rank
+        n_dominators -= D[front].sum(axis=0)
+        n_dominators[front] = -1
+        front = np.flatnonzero(n_dominators == 0)
+        rank += 1
+
+    return _fronts_from_ranks(ranks), ranks
+
+
+def sort_by_staircases(objectives):
+    """
+    Sweep-based sort for up to 3 objectives (in the spirit of Jensen's / Fortin's sweeps): O(N log N)
+    comparisons per front, plus the Staircase list splices, O(N) memmoves each in the worst case.
+
+    Identical vectors are collapsed first and the distinct ones are visited in lexicographic order, so a
+    point can only be dominated by points already visited, and it is dominated by one of them exactly when
+    that point is no worse in the last two objectives. Each front keeps a Staircase of those two objectives;
+    since a point dominated by front k is also dominated by front k - 1, its front is found by binary search.
+    returns: (fronts, ranks), fronts as lists of indices and ranks as an (N,) int array
+    """
+    F = np.asarray(objectives)
+    if len(F) == 0:
+        return [], np.zeros(0, dtype=int)
+    if F.shape[1] > 3:
+        raise ValueError("sort_by_staircases supports at most 3 objectives")
+
+    # pad to three objectives: constant trailing columns never decide dominance
+    F = np.hstack([F, np.zeros((len(F), 3 - F.shape[1]), dtype=F.dtype)])
+    unique, inverse = np.unique(F, axis=0, return_inverse=True)
+
+    staircases = []
+    unique_ranks = np.empty(len(unique), dtype=int)
+    for i, (_, y, z) in enumerate(unique.tolist()):
+        lo, hi = 0, len(staircases)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if staircases[mid].dominates(y, z):
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(staircases):
+            staircases.append(Staircase())
+        staircases[lo].insert(y, z)
+        unique_ranks[i] = lo
+
+    ranks = unique_ranks[inverse.reshape(-1)]
+    return _fronts_from_ranks(ranks), ranks
+
+
+def non_dominated_sort(objectives, method="auto"):
+    """
+    objectives: (N, M) array or list of objective tuples (minimization)
+    method: "matrix" (dominance matrix), "staircase" (sweep, up to 3 objectives) or "auto", which uses the
+    sweep whenever there are 3 or fewer objectives (it is already faster than the matrix at N = 200)
+    returns: (fronts, ranks), fronts as lists of indices in ascending order and ranks as an (N,) int array
+    """
+    n_obj = np.shape(objectives)[1] if len(objectives) else 0
+    if method == "auto":
+        method = "staircase" if n_obj <= 3 else "matrix"
+
+    if method == "matrix":
+        return sort_by_dominance_matrix(objectives)
+    if method == "staircase":
+        return sort_by_staircases(objectives)
+    raise ValueError(f"unknown method {method!r}")
@@ -1,7 +1,9 @@
 import numpy as np
-from tqdm import tqdm
-from math import inf
-import random 
+import moo_functions
+from moo_functions import crowding_distances
+from nondominated_sort import non_dominated_sort
+from population import as_generator, seeded_population, uniform_crossover, bit_flip_mutation, unique_indices
+from stopping import CountingEvaluator, generation_range, run_until
 
 def dominates(a, b):
     """Return True if solution a dominates solution b (minimization)."""
@@ -13,90 +15,126 @@ def fast_non_dominated_sort(objectives):
     objectives: list of objective tuples
     returns: list of fronts (lists of indices)
     """
-    S = [[] for _ in range(len(objectives))]
-    n = [0] * len(objectives)
-    rank = [0] * len(objectives)
-
-    fronts = [[]]
-
-    for p in range(len(objectives)):
-        for q in range(len(objectives)):
-            if dominates(objectives[p], objectives[q]):
-                S[p].append(q)
-            elif dominates(objectives[q], objectives[p]):
-                n[p] += 1
-
-        if n[p] == 0:
-            rank[p] = 0
-            fronts[0].append(p)
-
-    i = 0
-    while fronts[i]:
-        next_front = []
-        for p in fronts[i]:
-            for q in S[p]:
-                n[q] -= 1
-                if n[q] == 0:
-                    rank[q] = i + 1
-                    next_front.append(q)
-        i += 1
-        fronts.append(next_front)
-
-    return fronts[:-1]
+    fronts, _ = non_dominated_sort(objectives)
+    return fronts
 
 def crowding_distance(front, objectives):
-    distances = {i: 0.0 for i in front}
-    num_objectives = len(objectives[0])
+    """
+    front: list of indices into objectives
+    returns: (len(front),) array of crowding distances, aligned with front
+    """
+    return crowding_distances(np.asarray(objectives)[front])
 
-    for m in range(num_objectives):
-        front_sorted = sorted(front, key=lambda i: objectives[i][m])
-        distances[front_sorted[0]] = inf
-        distances[front_sorted[-1]] = inf
+def tournament_selection(ranks, crowding, n, rng=None):
+    """
+    Runs n binary tournaments at once: lower rank wins, then larger crowding distance.
+    returns: (n,) array of the winners' indices
+    """
+    rng = as_generator(rng)
+    N = len(ranks)
+    i = rng.integers(0, N, size=n)
+    j = rng.integers(0, N - 1, size=n)
+    j += j >= i
 
-        min_val = objectives[front_sorted[0]][m]
-        max_val = objectives[front_sorted[-1]][m]
+    i_wins = (ranks[i] < ranks[j]) | ((ranks[i] == ranks[j]) & (crowding[i] > crowding[j]))
+    return np.where(i_wins, i, j)
 
-        if max_val == min_val:
-            continue
+def iterate(
+    evaluate_solution_metrics,
+    num_tops,
+    num_bottoms,
+    all_clothes_list,
+    n_bits,
+    pop_size=100,
+    generations=100,
+    crossover_rate=0.9,
+    mutation_rate=0.02,
+    pareto_archive=None,
+    cache=None,
+    initial_population=None,
+    profiler=None,
+    rng=None,
+    occasions=None,
+    min_outfits=None,
+):
+    """
+    Same arguments as run (generations=None runs until the caller stops iterating).
+    yields: a stopping.Snapshot of the initial population, then one after every generation
+    """
+    custom = evaluate_solution_metrics is not moo_functions.evaluate_solution_metrics
+    if custom and (cache is not None or occasions or min_outfits):
+        raise ValueError("cache, occasions and min_outfits need the stock evaluate_solution_metrics")
+    evaluate_batch = moo_functions.population_evaluator(
+        num_tops, num_bottoms, all_clothes_list, cache, pareto_archive, occasions, min_outfits
+    )
+
+    def evaluate_any(solutions):
+        # the stock metrics function can score the whole batch in one pass
+        if not custom:
+            return evaluate_batch(solutions)
+        objectives = np.array([evaluate_solution_metrics(sol, num_tops, num_bottoms, all_clothes_list) for sol in solutions])
+        if pareto_archive is not None:
+            pareto_archive.add_many(solutions, objectives)
+        return objectives
+
+    evaluate = CountingEvaluator(evaluate_any, profiler)
+    profiler = evaluate.profiler
+    rng = as_generator(rng)
 
-        for i in range(1, len(front_sorted) - 1):
-            prev_val = objectives[front_sorted[i - 1]][m]
-            next_val = objectives[front_sorted[i + 1]][m]
-            distances[front_sorted[i]] += (next_val - prev_val) / (max_val - min_val)
+    # ----- Initialize population -----
+    population = seeded_population(initial_population, pop_size, n_bits, rng)
+    objectives = evaluate(population)
+    yield evaluate.snapshot(0, population, objectives)
 
-    return distances
+    for gen in generation_range(generations):
 
-def tournament_selection(population, objectives, ranks, crowding):
-    i, j = random.sample(range(len(population)), 2)
+        # ----- Rank & crowding -----
+        with profiler.phase("rank"):
+            fronts, ranks = non_dominated_sort(objectives)
 
-    if ranks[i] < ranks[j]:
-        return population[i]
-    elif ranks[j] < ranks[i]:
-        return population[j]
-    else:
-        return population[i] if crowding[i] > crowding[j] else population[j]
+        with profiler.phase("crowding"):
+            crowding = np.zeros(len(objectives))
+            for front in fronts:
+                crowding[front] = crowding_distance(front, objectives)
 
-def uniform_crossover(p1, p2, p=0.5):
-    mask = np.random.rand(len(p1)) < p
-    child = np.where(mask, p1, p2)
-    return child
+        # ----- Create offspring -----
+        with profiler.phase("select"):
+            parents = population[tournament_selection(ranks, crowding, 2 * pop_size, rng)]
+            parents_1, parents_2 = parents[:pop_size], parents[pop_size:]
 
-def bit_flip_mutation(sol, mutation_rate):
-    flip = np.random.rand(len(sol)) < mutation_rate
-    sol[flip] = 1 - sol[flip]
-    return sol
+        with profiler.phase("vary"):
+            do_crossover = rng.random((pop_size, 1)) < crossover_rate
+            offspring = np.where(do_crossover, uniform_crossover(parents_1, parents_2, rng=rng), parents_1)
+            offspring = bit_flip_mutation(offspring, mutation_rate, rng)
 
-def deduplicate_population(population):
-    seen = set()
-    unique = []
+        # ----- Evaluate & combine -----
+        # the survivors keep their objectives, so only the offspring are scored
+        offspring_objectives = evaluate(offspring)
 
-    for sol in population:
-        key = tuple(sol.tolist())   # or sol.tobytes()
-        if key not in seen:
-            seen.add(key)
-            unique.append(sol)
+        # ----- Environmental selection -----
+        with profiler.phase("truncate"):
+            combined = np.concatenate([population, offspring])
+            combined_objectives = np.concatenate([objectives, offspring_objectives])
+            unique = unique_indices(combined)
+            combined, combined_objectives = combined[unique], combined_objectives[unique]
+
+            fronts = fast_non_dominated_sort(combined_objectives)
+            survivors = []
+
+            for front in fronts:
+                if len(survivors) + len(front) <= pop_size:
+                    survivors.extend(front)
+                else:
+                    cd = crowding_distance(front, combined_objectives)
+                    sorted_front = np.array(front)[np.argsort(-cd, kind="stable")]
+                    remaining = pop_size - len(survivors)
+                    survivors.extend(sorted_front[:remaining])
+                    break
+
+            population = combined[survivors]
+            objectives = combined_objectives[survivors]
+        yield evaluate.snapshot(gen, population, objectives)
 
-    return unique
 
 def run(
     evaluate_solution_metrics,
@@ -108,67 +146,38 @@ def run(
     generations=100,
     crossover_rate=0.9,
     mutation_rate=0.02,
+    pareto_archive=None,
+    cache=None,
+    initial_population=None,
+    stopping=None,
+    profiler=None,
+    progress=True,
+    rng=None,
+    occasions=None,
+    min_outfits=None,
 ):
-    # ----- Initialize population -----
-    population = [np.random.randint(0, 2, n_bits) for _ in range(pop_size)]
-
-    with tqdm(total=generations, desc="Processing items") as pbar:
-        for gen in range(generations):
-    
-            # ----- Evaluate -----
-            objectives = [evaluate_solution_metrics(sol, num_tops, num_bottoms, all_clothes_list) for sol in population]
-    
-            # ----- Rank & crowding -----
-            fronts = fast_non_dominated_sort(objectives)
-            ranks = {}
-            crowding = {}
-    
-            for rank, front in enumerate(fronts):
-                cd = crowding_distance(front, objectives)
-                for i in front:
-                    ranks[i] = rank
-                    crowding[i] = cd[i]
-    
-            # ----- Create offspring -----
-            offspring = []
-            while len(offspring) < pop_size:
-                p1 = tournament_selection(population, objectives, ranks, crowding)
-                p2 = tournament_selection(population, objectives, ranks, crowding)
-    
-                if random.random() < crossover_rate:
-                    child = uniform_crossover(p1, p2)
-                else:
-                    child = p1.copy()
-    
-                child = bit_flip_mutation(child, mutation_rate)
-                offspring.append(child)
-    
-            # ----- Combine -----
-            combined = population + offspring
-            combined = deduplicate_population(combined)
-            combined_objectives = [evaluate_solution_metrics(sol, num_tops, num_bottoms, all_clothes_list) for sol in combined]
-            
-    
-            # ----- Environmental selection -----
-            fronts = fast_non_dominated_sort(combined_objectives)
-            new_population = []
-    
-            for front in fronts:
-                if len(new_population) + len(front) <= pop_size:
-                    new_population.extend([combined[i] for i in front])
-                else:
-                    cd = crowding_distance(front, combined_objectives)
-                    sorted_front = sorted(front, key=lambda i: cd[i], reverse=True)
-                    remaining = pop_size - len(new_population)
-                    new_population.extend([combined[i] for i in sorted_front[:remaining]])
-                    break
-    
-            population = new_population
-    
-            pbar.update(1)
-
-    solutions = []
-    for ind in population:
-        solutions.append(evaluate_solution_metrics(ind, num_tops, num_bottoms, all_clothes_list))
-        
-    return population, solutions
+    """
+    pareto_archive: optional moo_functions.ParetoArchive that every evaluated solution is fed into
+    cache: optional moo_functions.EvaluationCache
+    (cache, occasions and min_outfits need the stock metrics function; ValueError with a custom one)
+    initial_population: optional individuals to start from (topped up at random to pop_size)
+    stopping: optional stopping criterion or list of criteria (see stopping.py), checked every generation
+    profiler: optional profiling.Profiler collecting phase timings and a per-generation trace
+    progress: show the progress bar
+    rng: numpy Generator or seed for this run (None draws the seed from the global np.random state)
+    occasions: optional occasion columns whose outfits lost become extra objectives (moo_functions.occasion_columns)
+    min_outfits: optional {occasion column (None for the base case): minimum outfits} constraints
+    (see moo_functions.population_evaluator)
+    returns: final population and its objective tuples
+    """
+    snapshot = run_until(
+        iterate(
+            evaluate_solution_metrics, num_tops, num_bottoms, all_clothes_list, n_bits, pop_size, generations,
+            crossover_rate, mutation_rate, pareto_archive, cache, initial_population, profiler, rng,
+            occasions, min_outfits,
+        ),
+        generations,
+        stopping,
+        progress,
+    )
+    return snapshot.population, [tuple(objs) for objs in snapshot.objectives.tolist()]
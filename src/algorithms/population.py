@@ -0,0 +1,76 @@
+import numpy as np
+from moo_functions import pack_solutions
+
+# Populations are contiguous (N, n_bits) uint8 matrices of 0/1 genes, one individual per row.
+# Every operator works on the whole matrix at once; passing a single 1-D solution also works.
+# Random operators take rng: a numpy Generator, a seed, or None for a Generator seeded from the global
+# np.random state (so np.random.seed still makes a run reproducible).
+
+
+def as_generator(rng=None):
+    """numpy Generator for rng (a Generator is passed through, anything else seeds a new one)."""
+    if isinstance(rng, np.random.Generator):
+        return rng
+    if rng is None:
+        return np.random.default_rng(np.random.randint(2**32 - 1, dtype=np.uint64))
+    return np.random.default_rng(rng)
+
+
+def random_population(size, n_bits, rng=None):
+    """Uniformly random population of shape (size, n_bits)."""
+    return as_generator(rng).integers(0, 2, size=(size, n_bits), dtype=np.uint8)
+
+
+def as_population(solutions):
+    """Converts a list of solutions (or any 0/1 array) to a population matrix."""
+    return np.ascontiguousarray(np.asarray(solutions), dtype=np.uint8)
+
+
+def seeded_population(initial, size, n_bits, rng=None):
+    """Population of shape (size, n_bits) starting from the rows of initial (extra rows dropped, missing rows random)."""
+    if initial is None:
+        return random_population(size, n_bits, rng)
+    initial = as_population(initial).reshape(-1, n_bits)[:size]
+    return np.concatenate([initial, random_population(size - len(initial), n_bits, rng)])
+
+
+def uniform_crossover(p1, p2, p=0.5, rng=None):
+    """Each gene comes from p1 with probability p, otherwise from p2 (row by row)."""
+    mask = as_generator(rng).random(np.shape(p1)) < p
+    return np.where(mask, p1, p2)
+
+
+def one_point_crossover(p1, p2, rng=None):
+    """Child takes the head of p1 and the tail of p2, with a random cut point in [1, n_bits) per row."""
+    p1 = np.asarray(p1)
+    n_bits = p1.shape[-1]
+    points = as_generator(rng).integers(1, n_bits, size=p1.shape[:-1] + (1,))
+    return np.where(np.arange(n_bits) < points, p1, p2)
+
+
+def bit_flip_mutation(sol, mutation_rate, rng=None):
+    """Flips every gene independently with probability mutation_rate; returns a new array."""
+    flip = as_generator(rng).random(np.shape(sol)) < mutation_rate
+    return np.asarray(sol) ^ flip
+
+
+def unique_indices(population):
+    """Indices of the first copy of every distinct individual, in ascending order."""
+    _, first = np.unique(pack_solutions(as_population(population)), return_index=True)
+    return np.sort(first)
+
+
+def deduplicate_population(population):
+    """Drops repeated individuals, keeping the first copy of each in order."""
+    population = as_population(population)
+    return population[unique_indices(population)]
+
+
+def pack_population(population):
+    """Bit-packed copy of a population (8 genes per byte) for compact storage."""
+    return np.packbits(as_population(population), axis=1)
+
+
+def unpack_population(packed, n_bits):
+    """Inverse of pack_population."""
+    return np.unpackbits(packed, axis=1, count=n_bits)
@@ -0,0 +1,115 @@
+import json
+from time import perf_counter
+from collections import defaultdict
+from contextlib import nullcontext
+
+# Instrumentation shared by the algorithms' iterate() / run(). The loops wrap their phases in
+# `with profiler.phase(name):` and call profiler.end_generation(snapshot) once per generation (including
+# generation 0, the initial population). Phase names used by the in-repo algorithms:
+#   evaluate, rank, crowding (nsga2), density (spea2), select, vary, truncate, replace (MOEA/D)
+# Without a profiler the loops get NULL_PROFILER, whose hooks do nothing.
+
+
+class _Phase:
+
+    """ Context manager adding the time spent inside it to one phase of the current generation. """
+
+    __slots__ = ("times", "name", "start")
+
+    def __init__(self, times, name):
+        self.times = times
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc):
+        self.times[self.name] += perf_counter() - self.start
+
+
+class Profiler:
+
+    """ Per-phase timers, counters and per-generation callbacks for one run.
+
+    Every generation becomes one row of the trace: generation, elapsed time, evaluation count, the seconds
+    spent in each phase (time_<phase>), any counters bumped with count(), and with a cache attached, the
+    cache hits and misses of that generation.
+    Args:
+        cache (EvaluationCache): Optional, the cache the run uses, for per-generation hit / miss counts
+        callbacks (list): Optional functions called as callback(snapshot, row) after every generation
+    """
+
+    def __init__(self, cache=None, callbacks=()):
+        self.cache = cache
+        self.callbacks = list(callbacks)
+        self.totals = defaultdict(float)
+        self.trace = []
+        self._times = defaultdict(float)
+        self._counts = defaultdict(int)
+        self._cache_info = cache.cache_info() if cache is not None else None
+
+    def phase(self, name):
+        return _Phase(self._times, name)
+
+    def count(self, name, n=1):
+        self._counts[name] += n
+
+    def end_generation(self, snapshot):
+        row = dict(generation=snapshot.generation, elapsed=snapshot.elapsed, evaluations=snapshot.evaluations)
+        for name, seconds in self._times.items():
+            row[f"time_{name}"] = seconds
+            self.totals[name] += seconds
+        row.update(self._counts)
+        if self.cache is not None:
+            info = self.cache.cache_info()
+            row["cache_hits"] = info.hits - self._cache_info.hits
+            row["cache_misses"] = info.misses - self._cache_info.misses
+            self._cache_info = info
+
+        self.trace.append(row)
+        self._times.clear()
+        self._counts.clear()
+        for callback in self.callbacks:
+            callback(snapshot, row)
+
+    def summary(self):
+
+        """ Total seconds per phase over the run so far, largest first. """
+
+        return dict(sorted(self.totals.items(), key=lambda item: -item[1]))
+
+    def to_dataframe(self):
+
+        """ The trace as a DataFrame, one row per generation (phases a generation skipped are 0). """
+
+        import pandas as pd
+        trace = pd.DataFrame(self.trace)
+        timers = [c for c in trace.columns if c.startswith("time_")]
+        trace[timers] = trace[timers].fillna(0.0)
+        return trace
+
+    def to_json(self, path):
+
+        """ Writes the phase totals and the per-generation trace to a JSON file. """
+
+        with open(path, "w") as f:
+            json.dump(dict(totals=self.summary(), trace=self.trace), f, indent=1)
+
+
+class NullProfiler:
+
+    """ Profiler stand-in whose hooks do nothing, used when no profiler is attached. """
+
+    _phase = nullcontext()
+
+    def phase(self, name):
+        return self._phase
+
+    def count(self, name, n=1):
+        pass
+
+    def end_generation(self, snapshot):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
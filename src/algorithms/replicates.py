@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tqdm import tqdm
+from moo_functions import ParetoArchive
+from indicators import ReferenceFront, hypervolume
+from islands import run_algorithm
+from sms_emoa import default_reference_point
+
+# Replicated runs for statistical comparisons: every configuration runs R times, each replicate with its
+# own Generator spawned from one SeedSequence(seed), all replicates of all configurations sharing one
+# process pool. Indicators are computed in the parent from each replicate's non-dominated set.
+
+
+def _run_replicate(algorithm, wardrobe, generations, rng, kwargs):
+    # one replicate: its non-dominated objective vectors and its wall time
+    archive = ParetoArchive()
+    start = perf_counter()
+    run_algorithm(algorithm, wardrobe, generations, pareto_archive=archive, rng=rng, kwargs=kwargs)
+    return archive.objectives, perf_counter() - start
+
+
+def run(
+    configurations,
+    num_tops,
+    num_bottoms,
+    all_clothes_list,
+    replicates=30,
+    generations=100,
+    seed=None,
+    reference_front=None,
+    ref_point=None,
+    max_workers=None,
+    progress=True
+):
+    """
+    Runs every configuration `replicates` times across a process pool.
+    configurations: dict of name -> dict(algorithm=..., **algorithm kwargs), or a list of algorithm names
+    (see islands.run_algorithm; "generations" in a configuration overrides the shared value)
+    seed: seed of the SeedSequence the replicates' streams are spawned from; configurations get the same
+    R streams, so replicate r of every configuration starts from the same seed
+    reference_front: optional reference front (array or indicators.ReferenceFront) for IGD, IGD+, GD,
+    recovered count and hypervolume ratio
+    ref_point: hypervolume reference point, by default the front's (if given) or sms_emoa.default_reference_point
+    max_workers: process count, os.cpu_count() by default
+    returns: DataFrame with one row per run: configuration, replicate, wall_time, n_nondominated and the indicators
+    """
+    if not isinstance(configurations, dict):
+        configurations = {name: dict(algorithm=name) for name in configurations}
+    if reference_front is not None and not isinstance(reference_front, ReferenceFront):
+        reference_front = ReferenceFront(reference_front, ref_point)
+    if ref_point is None:
+        ref_point = (
+            reference_front.ref_point if reference_front is not None
+            else default_reference_point(num_tops, num_bottoms, all_clothes_list)
+        )
+
+    wardrobe = (num_tops, num_bottoms, all_clothes_list)
+    streams = np.random.SeedSequence(seed).spawn(replicates)
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+        for name, configuration in configurations.items():
+            kwargs = dict(configuration)
+            algorithm = kwargs.pop("algorithm")
+            n_generations = kwargs.pop("generations", generations)
+            for r, stream in enumerate(streams):
+                future = pool.submit(
+                    _run_replicate, algorithm, wardrobe, n_generations, np.random.default_rng(stream), kwargs
+                )
+                futures[future] = (name, r)
+
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Processing items", disable=not progress):
+            name, r = futures[future]
+            objectives, wall_time = future.result()
+            objectives = np.empty((0, len(ref_point))) if objectives is None else objectives
+            row = dict(configuration=name, replicate=r, wall_time=wall_time, n_nondominated=len(objectives))
+            if reference_front is not None:
+                row.update(reference_front.summary(objectives))
+            else:
+                row["hypervolume"] = hypervolume(objectives, ref_point)
+            rows.append(row)
+
+    return pd.DataFrame(rows).sort_values(["configuration", "replicate"], ignore_index=True)
+
+
+def summarize(results, by="configuration"):
+    """
+    Median and interquartile range of every indicator per configuration.
+    results: DataFrame from run
+    returns: DataFrame indexed by `by` with columns (indicator, statistic), statistic in median, q25, q75, iqr
+    """
+    indicators = [c for c in results.columns if c not in (by, "replicate")]
+    grouped = results.groupby(by)[indicators]
+    q25 = grouped.quantile(0.25)
+    q75 = grouped.quantile(0.75)
+    table = pd.concat(
+        {"median": grouped.median(), "q25": q25, "q75": q75, "iqr": q75 - q25}, axis=1
+    ).swaplevel(axis=1)
+    return table[[(indicator, stat) for indicator in indicators for stat in ("median", "q25", "q75", "iqr")]]
+
+
+def compare(
+    configurations,
+    num_tops,
+    num_bottoms,
+    all_clothes_list,
+    replicates=30,
+    generations=100,
+    seed=None,
+    reference_front=None,
+    **kwargs
+):
+    """
+    Comparison table of several configurations: run followed by summarize.
+    returns: (summary table, per-run results)
+    """
+    results = run(
+        configurations, num_tops, num_bottoms, all_clothes_list, replicates, generations, seed, reference_front,
+        **kwargs
+    )
+    return summarize(results), results
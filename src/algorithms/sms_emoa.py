@@ -0,0 +1,200 @@
+import numpy as np
+from moo_functions import compile_wardrobe, population_evaluator, pack_solutions
+from hypervolume import HypervolumeContributions
+from nondominated_sort import non_dominated_sort
+from population import as_generator, seeded_population, uniform_crossover, bit_flip_mutation
+from stopping import CountingEvaluator, generation_range, run_until
+
+
+def default_reference_point(num_tops, num_bottoms, all_clothes_list):
+    """Reference point just past the worst value each objective can reach, so every suitcase counts."""
+    _, nadir = compile_wardrobe(num_tops, num_bottoms, all_clothes_list).objective_bounds()
+    return nadir + 1
+
+
+def solution_keys(X):
+    """Hashable keys of the rows of X (pack_solutions gives uint64 up to 64 items and Python ints beyond)."""
+    keys = pack_solutions(X)
+    return keys.tolist() if isinstance(keys, np.ndarray) else keys
+
+
+def binary_tournament(ranks, n, rng=None):
+    """Binary tournaments on non-domination rank (ties broken at random); returns the winners' indices."""
+    rng = as_generator(rng)
+    N = len(ranks)
+    i = rng.integers(0, N, size=n)
+    j = rng.integers(0, N - 1, size=n)
+    j += j >= i
+    return np.where(ranks[i] <= ranks[j], i, j)
+
+
+def iterate(
+    n_bits,
+    num_tops,
+    num_bottoms,
+    all_clothes_list,
+    pop_size=100,
+    generations=100,
+    crossover_rate=0.9,
+    mutation_rate=0.02,
+    ref_point=None,
+    pareto_archive=None,
+    cache=None,
+    initial_population=None,
+    profiler=None,
+    rng=None,
+    min_outfits=None,
+):
+    """
+    Generator behind run, same arguments (generations=None runs until the caller stops iterating).
+    yields: a stopping.Snapshot of the initial population, then one after every generation of pop_size steps
+    """
+    evaluate = CountingEvaluator(
+        population_evaluator(num_tops, num_bottoms, all_clothes_list, cache, pareto_archive, min_outfits=min_outfits),
+        profiler
+    )
+    profiler = evaluate.profiler
+    rng = as_generator(rng)
+    if ref_point is None:
+        ref_point = default_reference_point(num_tops, num_bottoms, all_clothes_list)
+
+    # slots 0..pop_size-1 hold the population, slot pop_size the child of the current step
+    X = np.zeros((pop_size + 1, n_bits), dtype=np.uint8)
+    X[:pop_size] = seeded_population(initial_population, pop_size, n_bits, rng)
+    F = np.zeros((pop_size + 1, len(ref_point)), dtype=np.result_type(np.int64, np.asarray(ref_point)))
+    F[:pop_size] = evaluate(X[:pop_size])
+    keys = set(solution_keys(X[:pop_size]))
+    yield evaluate.snapshot(0, X[:pop_size].copy(), F[:pop_size].copy())
+
+    _, ranks = non_dominated_sort(F[:pop_size])
+    ranks = np.append(ranks, 0)
+    front = HypervolumeContributions(ref_point)
+    for i in np.flatnonzero(ranks[:pop_size] == 0).tolist():
+        front.add(i, F[i])
+
+    def select_victim(child):
+        # updates the ranks for the child in slot pop_size and returns the slot to remove
+        population = F[:pop_size]
+        dominators = np.all(population <= child, axis=1) & np.any(population < child, axis=1)
+        ranks[pop_size] = ranks[:pop_size][dominators].max() + 1 if dominators.any() else 0
+
+        # only members the child dominates can move back a front; visiting them in lexicographic
+        # order settles each one's dominators before it
+        dominated = np.flatnonzero(np.all(child <= population, axis=1) & np.any(child < population, axis=1))
+        if dominated.size:
+            dominated = dominated[np.lexsort(F[dominated].T[::-1])]
+            sub = F[dominated]
+            among = np.all(sub[:, None, :] <= sub[None, :, :], axis=2) & np.any(sub[:, None, :] < sub[None, :, :], axis=2)
+            for idx, i in enumerate(dominated):
+                rank = ranks[pop_size] + 1
+                if among[:idx, idx].any():
+                    rank = max(rank, ranks[dominated[:idx][among[:idx, idx]]].max() + 1)
+                ranks[i] = max(ranks[i], rank)
+
+        # keep the engine in sync with the first front
+        for i in dominated.tolist():
+            if i in front:
+                front.remove(i)
+        if ranks[pop_size] == 0:
+            front.add(pop_size, child)
+
+        if ranks.max() == 0:
+            return front.argmin()
+
+        # several fronts: drop the member of the worst one that the most points dominate (Beume et al. 2007)
+        worst = np.flatnonzero(ranks == ranks.max())
+        if len(worst) == 1:
+            return int(worst[0])
+        n_dominators = (
+            np.all(F[None, :, :] <= F[worst][:, None, :], axis=2) &
+            np.any(F[None, :, :] < F[worst][:, None, :], axis=2)
+        ).sum(axis=1)
+        return int(worst[np.argmax(n_dominators)])
+
+    for gen in generation_range(generations):
+        for step in range(pop_size):
+            # ----- Create child -----
+            with profiler.phase("select"):
+                p1, p2 = X[binary_tournament(ranks[:pop_size], 2, rng)]
+            with profiler.phase("vary"):
+                child = uniform_crossover(p1, p2, rng=rng) if rng.random() < crossover_rate else p1.copy()
+                child = bit_flip_mutation(child, mutation_rate, rng)
+
+            key = solution_keys(child[None, :])[0]
+            if key in keys:
+                profiler.count("duplicates_skipped")
+                continue
+            X[pop_size] = child
+            F[pop_size] = evaluate(child[None, :])[0]
+
+            # ----- Remove the least contributing member -----
+            with profiler.phase("truncate"):
+                victim = select_victim(F[pop_size])
+                if victim != pop_size:
+                    keys.discard(solution_keys(X[victim][None, :])[0])
+                    keys.add(key)
+                    if victim in front:
+                        front.remove(victim)
+                    X[victim], F[victim], ranks[victim] = X[pop_size], F[pop_size], ranks[pop_size]
+                    if pop_size in front:
+                        front.relabel(pop_size, victim)
+                elif pop_size in front:
+                    front.remove(pop_size)
+
+        yield evaluate.snapshot(gen, X[:pop_size].copy(), F[:pop_size].copy())
+
+
+def run(
+    n_bits,
+    num_tops,
+    num_bottoms,
+    all_clothes_list,
+    pop_size=100,
+    generations=100,
+    crossover_rate=0.9,
+    mutation_rate=0.02,
+    ref_point=None,
+    pareto_archive=None,
+    cache=None,
+    initial_population=None,
+    stopping=None,
+    profiler=None,
+    progress=True,
+    rng=None,
+    min_outfits=None,
+):
+    """
+    Steady-state (mu + 1) SMS-EMOA. Each generation runs pop_size steps; a step breeds one child and then
+    drops one member: while the population spans several non-domination fronts, the member of the worst
+    front dominated by the most points, and once it is all non-dominated, the member with the smallest
+    exclusive hypervolume.
+
+    The contributions of the first front are kept in a HypervolumeContributions engine and updated
+    incrementally as members enter and leave, so the usual late-run case (the whole population is
+    non-dominated) never recomputes the hypervolume from scratch. Children that duplicate a member
+    are discarded without being evaluated.
+
+    ref_point: hypervolume reference point, by default just past the worst possible objective values
+    pareto_archive: optional moo_functions.ParetoArchive that every evaluated solution is fed into
+    cache: optional moo_functions.EvaluationCache
+    initial_population: optional individuals to start from (topped up at random to pop_size)
+    stopping: optional stopping criterion or list of criteria (see stopping.py), checked every generation
+    profiler: optional profiling.Profiler collecting phase timings and a per-generation trace
+    progress: show the progress bar
+    rng: numpy Generator or seed for this run (None draws the seed from the global np.random state)
+    min_outfits: optional {occasion column (None for the base case): minimum outfits} constraints
+    (see moo_functions.population_evaluator); occasion objectives are not supported, the hypervolume
+    engine being 3-objective
+    returns: final population and its objective tuples
+    """
+    snapshot = run_until(
+        iterate(
+            n_bits, num_tops, num_bottoms, all_clothes_list, pop_size, generations, crossover_rate,
+            mutation_rate, ref_point, pareto_archive, cache, initial_population, profiler, rng,
+            min_outfits,
+        ),
+        generations,
+        stopping,
+        progress,
+    )
+    return snapshot.population, [tuple(objs) for objs in snapshot.objectives.tolist()]
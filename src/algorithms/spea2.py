@@ -1,9 +1,11 @@
-import random
 import math
 import copy
 import numpy as np
-from moo_functions import evaluate_solution_metrics
-from tqdm import tqdm
+from scipy.spatial import cKDTree
+from moo_functions import population_evaluator
+from nondominated_sort import dominance_matrix
+from population import as_generator, seeded_population, bit_flip_mutation
+from stopping import CountingEvaluator, generation_range, run_until
 
 
 def dominates(a, b):
@@ -11,105 +13,128 @@ def dominates(a, b):
     return all(x <= y for x, y in zip(a, b)) and any(x < y for x, y in zip(a, b))
 
 
-def hamming_mutation(solution, mutation_rate):
-    """Bit-flip mutation."""
-    return np.array([
-        bit if random.random() > mutation_rate else 1 - bit
-        for bit in solution
-    ], dtype=int)
+def hamming_mutation(solution, mutation_rate, rng=None):
+    """Bit-flip mutation (of a single solution or a whole population)."""
+    return bit_flip_mutation(solution, mutation_rate, rng)
 
 
-def binary_tournament(pop):
-    """Binary tournament selection based on fitness."""
-    a, b = random.sample(pop, 2)
-    return a if a["fitness"] < b["fitness"] else b
+def binary_tournament(fitness, n, rng=None):
+    """Binary tournament selection based on fitness; returns the indices of n winners."""
+    rng = as_generator(rng)
+    N = len(fitness)
+    a = rng.integers(0, N, size=n)
+    b = rng.integers(0, N - 1, size=n)
+    b += b >= a
+    return np.where(fitness[a] < fitness[b], a, b)
 
 
-def compute_strength_and_raw_fitness(pop):
+def compute_strength_and_raw_fitness(objectives):
     """
-    Compute strength S(i) and raw fitness R(i).
+    Compute strength S(i) (number of solutions i dominates) and raw fitness R(i) (sum of the strengths
+    of i's dominators), both from one boolean dominance matrix.
+    returns: (N,) int array of raw fitness values
     """
-    N = len(pop)
-    strengths = [0] * N
-    raw_fitness = [0] * N
+    D = dominance_matrix(objectives)
+    strengths = D.sum(axis=1)
+    return D.T.astype(np.int64) @ strengths
 
-    # Strength: number of solutions dominated
-    for i in range(N):
-        for j in range(N):
-            if dominates(pop[i]["objectives"], pop[j]["objectives"]):
-                strengths[i] += 1
 
-    # Raw fitness: sum of strengths of dominators
-    for i in range(N):
-        for j in range(N):
-            if dominates(pop[j]["objectives"], pop[i]["objectives"]):
-                raw_fitness[i] += strengths[j]
-
-    return raw_fitness
-
-
-def compute_density(pop, k):
+def compute_density(objectives, k):
     """
-    Density estimation using k-th nearest neighbor.
+    Density estimation using the distance sigma_k to the k-th nearest neighbor (the solution itself
+    counting as the 0-th), queried from a KD-tree.
+    returns: (N,) array of densities 1 / (sigma_k + 2)
     """
-    N = len(pop)
-    distances = np.zeros((N, N))
-
-    for i in range(N):
-        for j in range(N):
-            distances[i, j] = math.dist(
-                pop[i]["objectives"], pop[j]["objectives"]
-            )
-
-    density = []
-    for i in range(N):
-        sorted_dist = np.sort(distances[i])
-        sigma_k = sorted_dist[k]
-        density.append(1.0 / (sigma_k + 2.0))
-
-    return density
-
-
-def environmental_selection(pop, archive_size):
+    points = np.asarray(objectives, dtype=float)
+    distances, _ = cKDTree(points).query(points, k=[k + 1])
+    return 1.0 / (distances[:, 0] + 2.0)
+
+
+def _lexicographic_min(F, candidates, order, sorted_dist, alive, ptr):
+    # walks the candidates' sorted neighbour lists in step, one alive neighbour at a time, keeping only
+    # those with the smallest distance at each level; survivors of every level are all equivalent.
+    # Copies of the same point have identical lists, so only the first copy of each takes part.
+    if len(candidates) > 1:
+        _, first = np.unique(F[candidates], axis=0, return_index=True)
+        candidates = candidates[np.sort(first)]
+    cursors = ptr[candidates].copy()
+    n_cols = order.shape[1]
+    while len(candidates) > 1:
+        for c, i in enumerate(candidates):
+            j = cursors[c] + 1
+            while j < n_cols and not alive[order[i, j]]:
+                j += 1
+            cursors[c] = j
+        if cursors[0] >= n_cols:
+            break
+        d = sorted_dist[candidates, cursors]
+        keep = d == d.min()
+        candidates, cursors = candidates[keep], cursors[keep]
+    return candidates[0]
+
+
+def truncate_archive(objectives, archive_size):
+    """
+    SPEA2 truncation: repeatedly removes the member whose distances to the remaining members, sorted in
+    ascending order, are lexicographically smallest (closest nearest neighbour, ties broken by the second
+    nearest, and so on).
+
+    Distances are computed once and each row's neighbours sorted once; a per-row pointer to the nearest
+    neighbour still in the archive skips removed members, so a removal only touches the rows that pointed
+    at it. Total cost is O(n^2 log n) for the sort plus amortized O(n^2) pointer moves.
+    objectives: (n, M) array or list of objective tuples of the archive members
+    returns: indices of the kept members, in ascending order
+    """
+    F = np.asarray(objectives, dtype=float)
+    n = len(F)
+    if n <= archive_size:
+        return np.arange(n)
+
+    dist = np.sqrt(((F[:, None, :] - F[None, :, :]) ** 2).sum(axis=2))
+    np.fill_diagonal(dist, np.inf)
+    order = np.argsort(dist, axis=1, kind="stable")[:, :-1]  # the member itself sorts last
+    sorted_dist = np.take_along_axis(dist, order, axis=1)
+
+    alive = np.ones(n, dtype=bool)
+    ptr = np.zeros(n, dtype=int)
+    for _ in range(n - archive_size):
+        rows = np.flatnonzero(alive)
+        nearest = sorted_dist[rows, ptr[rows]]
+        candidates = rows[nearest == nearest.min()]
+        victim = _lexicographic_min(F, candidates, order, sorted_dist, alive, ptr)
+        alive[victim] = False
+
+        # only rows whose nearest neighbour was the victim need their pointer moved
+        for i in rows[order[rows, ptr[rows]] == victim].tolist():
+            while ptr[i] < n - 2 and not alive[order[i, ptr[i]]]:
+                ptr[i] += 1
+
+    return np.flatnonzero(alive)
+
+
+def environmental_selection(objectives, fitness, archive_size):
     """
     Select archive using SPEA2 fitness and truncation.
+    returns: indices of the selected individuals
     """
     # Step 1: Keep all fitness < 1
-    archive = [ind for ind in pop if ind["fitness"] < 1]
+    archive = [i for i in range(len(fitness)) if fitness[i] < 1]
 
     # Step 2: If too many, truncate using distance
     if len(archive) > archive_size:
-        while len(archive) > archive_size:
-            distances = np.zeros((len(archive), len(archive)))
-            for i in range(len(archive)):
-                for j in range(len(archive)):
-                    distances[i, j] = math.dist(
-                        archive[i]["objectives"],
-                        archive[j]["objectives"]
-                    )
-
-            # Remove individual with minimum distance to others
-            min_dist = float("inf")
-            remove_idx = None
-            for i in range(len(archive)):
-                d = np.sort(distances[i])[1]
-                if d < min_dist:
-                    min_dist = d
-                    remove_idx = i
-
-            archive.pop(remove_idx)
-    
+        kept = truncate_archive(np.asarray(objectives)[archive], archive_size)
+        archive = [archive[i] for i in kept.tolist()]
+
     # Step 3: If too few, fill with best remaining
     elif len(archive) < archive_size:
-        #remaining = [ind for ind in pop if ind not in archive]
-        remaining = [ind for ind in pop if ind["fitness"] >= 1]
-        remaining.sort(key=lambda x: x["fitness"])
+        remaining = [i for i in range(len(fitness)) if fitness[i] >= 1]
+        remaining.sort(key=lambda i: fitness[i])
         archive.extend(remaining[:archive_size - len(archive)])
 
     return archive
 
 
-def run(
+def iterate(
     n_bits,
     num_tops,
     num_bottoms,
@@ -117,55 +142,113 @@ def run(
     population_size,
     archive_size,
     generations,
-    mutation_rate=0.01
+    mutation_rate=0.01,
+    pareto_archive=None,
+    cache=None,
+    initial_population=None,
+    profiler=None,
+    rng=None,
+    occasions=None,
+    min_outfits=None
 ):
+    """
+    Same arguments as run (generations=None runs until the caller stops iterating).
+    yields: a stopping.Snapshot of the initial population, then one of the SPEA2 archive after every generation
+    """
+    evaluate_batch = CountingEvaluator(
+        population_evaluator(num_tops, num_bottoms, all_clothes_list, cache, pareto_archive, occasions, min_outfits),
+        profiler
+    )
+    profiler = evaluate_batch.profiler
+    rng = as_generator(rng)
+
+    def evaluate(solutions, *parents):
+        return [tuple(objs) for objs in evaluate_batch(solutions, *parents).tolist()]
+
     # --- Initialization ---
-    population = []
-    for _ in range(population_size):
-        sol = np.random.randint(0, 2, size=n_bits)
-        population.append({
-            "solution": sol,
-            "objectives": evaluate_solution_metrics(sol, num_tops, num_bottoms, all_clothes_list),
-            "fitness": None
-        })
+    population = seeded_population(initial_population, population_size, n_bits, rng)
+    objectives = evaluate(population)
+    yield evaluate_batch.snapshot(0, population, objectives)
 
-    archive = []
+    archive = population[:0]
+    archive_objectives = []
 
     # --- Evolution loop ---
-    with tqdm(total=generations, desc="Processing items") as pbar:
-        for gen in range(generations):
-            # Combine population and archive
-            union = population + archive
-    
-            # Strength & raw fitness
-            raw_fitness = compute_strength_and_raw_fitness(union)
-    
-            # Density estimation
+    for gen in generation_range(generations):
+        # Combine population and archive
+        union = np.concatenate([population, archive])
+        union_objectives = objectives + archive_objectives
+
+        # Strength & raw fitness
+        with profiler.phase("rank"):
+            raw_fitness = compute_strength_and_raw_fitness(union_objectives)
+
+        # Density estimation
+        with profiler.phase("density"):
             k = int(math.sqrt(len(union)))
-            density = compute_density(union, k)
-    
-            # Final fitness
-            for i in range(len(union)):
-                union[i]["fitness"] = raw_fitness[i] + density[i]
-    
-            # Environmental selection
-            archive = environmental_selection(union, archive_size)
-    
-            # --- Reproduction ---
-            offspring = []
-            while len(offspring) < population_size:
-                parent = binary_tournament(archive)
-                child_sol = hamming_mutation(parent["solution"], mutation_rate)
-                offspring.append({
-                    "solution": child_sol,
-                    "objectives": evaluate_solution_metrics(child_sol, num_tops, num_bottoms, all_clothes_list),
-                    "fitness": None
-                })
-    
-            population = offspring
-    
-            pbar.update(1)
-
-    solutions = [ind["solution"] for ind in archive]
-    objectives = [ind["objectives"] for ind in archive]
-    return solutions, objectives
+            density = compute_density(union_objectives, k)
+
+        # Final fitness
+        fitness = raw_fitness + density
+
+        # Environmental selection
+        with profiler.phase("truncate"):
+            selected = environmental_selection(union_objectives, fitness, archive_size)
+            archive = union[selected]
+            archive_objectives = [union_objectives[i] for i in selected]
+
+        # --- Reproduction ---
+        with profiler.phase("select"):
+            parents = binary_tournament(fitness[selected], population_size, rng)
+        with profiler.phase("vary"):
+            population = hamming_mutation(archive[parents], mutation_rate, rng)
+        # mutation-only children are scored incrementally from their parents
+        objectives = evaluate(population, archive[parents], np.asarray(archive_objectives)[parents])
+
+        yield evaluate_batch.snapshot(gen, archive, archive_objectives)
+
+
+def run(
+    n_bits,
+    num_tops,
+    num_bottoms,
+    all_clothes_list,
+    population_size,
+    archive_size,
+    generations,
+    mutation_rate=0.01,
+    pareto_archive=None,
+    cache=None,
+    initial_population=None,
+    stopping=None,
+    profiler=None,
+    progress=True,
+    rng=None,
+    occasions=None,
+    min_outfits=None
+):
+    """
+    initial_population: optional individuals to start from (topped up at random to population_size)
+    pareto_archive: optional moo_functions.ParetoArchive that every evaluated solution is fed into
+    (not to be confused with the SPEA2 archive, which is bounded by archive_size)
+    cache: optional moo_functions.EvaluationCache
+    stopping: optional stopping criterion or list of criteria (see stopping.py), checked every generation
+    profiler: optional profiling.Profiler collecting phase timings and a per-generation trace
+    progress: show the progress bar
+    rng: numpy Generator or seed for this run (None draws the seed from the global np.random state)
+    occasions: optional occasion columns whose outfits lost become extra objectives (moo_functions.occasion_columns)
+    min_outfits: optional {occasion column (None for the base case): minimum outfits} constraints
+    (see moo_functions.population_evaluator)
+    returns: final SPEA2 archive and its objective tuples
+    """
+    snapshot = run_until(
+        iterate(
+            n_bits, num_tops, num_bottoms, all_clothes_list, population_size, archive_size, generations,
+            mutation_rate, pareto_archive, cache, initial_population, profiler, rng,
+            occasions, min_outfits
+        ),
+        generations,
+        stopping,
+        progress
+    )
+    return snapshot.population, [tuple(objs) for objs in snapshot.objectives.tolist()]
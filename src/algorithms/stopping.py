@@ -0,0 +1,132 @@
+import time
+import numpy as np
+from collections import namedtuple
+from itertools import count
+from tqdm import tqdm
+from moo_functions import ParetoArchive
+from hypervolume import hypervolume_3d
+from profiling import NULL_PROFILER
+
+# Every algorithm's iterate() yields a Snapshot of the initial population (generation 0) and then one
+# per generation; run() drives it through run_until, which stops at the generation budget or as soon as
+# a stopping criterion fires. A criterion is any callable taking a Snapshot and returning True to stop;
+# the stateful ones below keep a history, so use a fresh instance for every run.
+
+Snapshot = namedtuple("Snapshot", ["generation", "population", "objectives", "evaluations", "elapsed"])
+
+
+class CountingEvaluator:
+
+    """ Wraps a population evaluator, counts the solutions it scores and times them as the profiler's
+    "evaluate" phase; snapshot() also closes the profiler's generation.
+    """
+
+    def __init__(self, evaluate, profiler=None):
+        self.evaluate = evaluate
+        self.profiler = NULL_PROFILER if profiler is None else profiler
+        self.count = 0
+        self.start = time.perf_counter()
+
+    def __call__(self, X, *args, **kwargs):
+        self.count += len(X)
+        with self.profiler.phase("evaluate"):
+            return self.evaluate(X, *args, **kwargs)
+
+    def snapshot(self, generation, population, objectives):
+        snapshot = Snapshot(generation, population, np.asarray(objectives), self.count, time.perf_counter() - self.start)
+        self.profiler.end_generation(snapshot)
+        return snapshot
+
+
+def generation_range(generations):
+    """Generation numbers 1..generations, or an endless count when generations is None."""
+    return count(1) if generations is None else range(1, generations + 1)
+
+
+class HypervolumeStagnation:
+
+    """ Stops once the population's hypervolume has improved by less than tolerance (relative) over the
+    last window generations. Uses the first 3 objectives (outfits_lost, volume, liking), so occasion columns
+    are ignored, and needs a reference point they are all better than, e.g. sms_emoa.default_reference_point.
+    """
+
+    def __init__(self, ref_point, window=10, tolerance=1e-3):
+        self.ref_point = ref_point
+        self.window = window
+        self.tolerance = tolerance
+        self.history = []
+
+    def __call__(self, snapshot):
+        self.history.append(hypervolume_3d(np.asarray(snapshot.objectives)[:, :3], self.ref_point))
+        if len(self.history) <= self.window:
+            return False
+        before, now = self.history[-self.window - 1], self.history[-1]
+        return now - before <= self.tolerance * abs(before)
+
+
+class NoNewNonDominated:
+
+    """ Stops after `generations` generations in a row without a population point that no earlier
+    population point weakly dominates.
+    """
+
+    def __init__(self, generations=10):
+        self.generations = generations
+        self.archive = ParetoArchive()
+        self.stalled = 0
+
+    def __call__(self, snapshot):
+        if self.archive.add_many(snapshot.population, snapshot.objectives):
+            self.stalled = 0
+        else:
+            self.stalled += 1
+        return self.stalled >= self.generations
+
+
+class EvaluationBudget:
+
+    """ Stops once max_evaluations solutions have been scored (checked at the end of each generation). """
+
+    def __init__(self, max_evaluations):
+        self.max_evaluations = max_evaluations
+
+    def __call__(self, snapshot):
+        return snapshot.evaluations >= self.max_evaluations
+
+
+class Deadline:
+
+    """ Stops once the run has taken `seconds` of wall-clock time (checked at the end of each generation). """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self, snapshot):
+        return snapshot.elapsed >= self.seconds
+
+
+def should_stop(stopping, snapshot):
+    """
+    stopping: None, one criterion or a list of criteria (stops when any fires; all of them see every snapshot)
+    """
+    if stopping is None:
+        return False
+    if callable(stopping):
+        return bool(stopping(snapshot))
+    return any([criterion(snapshot) for criterion in stopping])
+
+
+def run_until(snapshots, generations, stopping=None, progress=True):
+    """
+    Consumes an iterate() generator behind the usual progress bar until it is exhausted or stopping fires.
+    progress: show the progress bar (switch it off for batch jobs)
+    returns: the last Snapshot
+    """
+    snapshot = None
+    with tqdm(total=generations, desc="Processing items", disable=not progress) as pbar:
+        for snapshot in snapshots:
+            if snapshot.generation:
+                pbar.update(1)
+            if should_stop(stopping, snapshot):
+                break
+    return snapshot
@@ -0,0 +1,107 @@
+import os
+import numpy as np
+from itertools import combinations
+from math import comb
+from scipy.spatial import cKDTree
+from population import as_generator
+
+# Weight vectors for decomposition methods (MOEA/D): points on the unit simplex, one per subproblem,
+# together with the table of each subproblem's T nearest neighbours.
+
+
+def das_dennis(n_partitions, n_objectives):
+    """
+    Das-Dennis simplex lattice: every weight vector whose components are multiples of 1 / n_partitions.
+    returns: (comb(n_partitions + n_objectives - 1, n_objectives - 1), n_objectives) array
+    """
+    # stars and bars: the M - 1 bar positions among H + M - 1 slots fix the M parts
+    bars = np.array(list(combinations(range(n_partitions + n_objectives - 1), n_objectives - 1)), dtype=int)
+    bars = bars.reshape(-1, n_objectives - 1)
+    edges = np.hstack([
+        np.full((len(bars), 1), -1), bars, np.full((len(bars), 1), n_partitions + n_objectives - 1)
+    ])
+    return (np.diff(edges, axis=1) - 1) / n_partitions
+
+
+def uniform_design(n, n_objectives):
+    """
+    n well-spread weight vectors for any n: a low-discrepancy (Kronecker / R-sequence) point set on the
+    unit cube [0, 1]^(M-1), mapped onto the simplex with Fang and Wang's uniform transformation.
+    returns: (n, n_objectives) array
+    """
+    d = n_objectives - 1
+    if d == 0:
+        return np.ones((n, 1))
+
+    # generalized golden ratio: the positive root of x^(d+1) = x + 1
+    phi = 2.0
+    for _ in range(50):
+        phi = (1 + phi) ** (1 / (d + 1))
+    alpha = phi ** -np.arange(1, d + 1)
+    u = (0.5 + np.arange(1, n + 1)[:, None] * alpha) % 1.0
+
+    weights = np.empty((n, n_objectives))
+    remaining = np.ones(n)
+    for k in range(d):
+        share = u[:, k] ** (1 / (d - k))
+        weights[:, k] = remaining * (1 - share)
+        remaining = remaining * share
+    weights[:, d] = remaining
+    return weights
+
+
+def simplex_weights(n, n_objectives, method="das-dennis", rng=None):
+    """
+    n: number of weight vectors
+    method: "das-dennis" (the largest simplex lattice with at most n points, topped up to exactly n with
+    uniform_design points), "uniform" (uniform_design only) or "random" (normalized uniform draws from rng)
+    returns: (n, n_objectives) array of rows summing to 1
+    """
+    if method == "random":
+        weights = as_generator(rng).random((n, n_objectives))
+        return weights / np.sum(weights, axis=1, keepdims=True)
+    if method == "uniform":
+        return uniform_design(n, n_objectives)
+    if method != "das-dennis":
+        raise ValueError(f"unknown method {method!r}")
+
+    H = 0
+    while comb(H + n_objectives, n_objectives - 1) <= n:
+        H += 1
+    if H == 0:
+        return uniform_design(n, n_objectives)
+    lattice = das_dennis(H, n_objectives)
+    return np.vstack([lattice, uniform_design(n - len(lattice), n_objectives)])
+
+
+def neighbor_table(weights, T):
+    """
+    Indices of each weight vector's T nearest weight vectors (itself first), from a KD-tree query instead
+    of a full N x N distance matrix. T is capped at N.
+    returns: (N, min(T, N)) int array
+    """
+    T = min(T, len(weights))
+    _, neighbors = cKDTree(weights).query(weights, k=np.arange(1, T + 1))
+    return neighbors
+
+
+def decomposition(n, n_objectives, T, method="das-dennis", cache_dir=None, rng=None):
+    """
+    Weight vectors and neighbor table for n subproblems. Deterministic methods are cached in cache_dir
+    (one .npz per method and (n, n_objectives, T)) so large tables are built only once.
+    returns: (weights, neighbors)
+    """
+    T = min(T, n)
+    path = None
+    if cache_dir is not None and method != "random":
+        path = os.path.join(cache_dir, f"weights_{method}_N{n}_M{n_objectives}_T{T}.npz")
+        if os.path.exists(path):
+            with np.load(path) as table:
+                return table["weights"], table["neighbors"]
+
+    weights = simplex_weights(n, n_objectives, method, rng)
+    neighbors = neighbor_table(weights, T)
+    if path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez(path, weights=weights, neighbors=neighbors)
+    return weights, neighbors
@@ -0,0 +1,344 @@
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "algorithms"))
+
+import moo_functions as moo
+from indicators import ReferenceFront, hypervolume
+from hypervolume import hypervolume_3d
+import nondominated_sort
+import nsga2
+import spea2
+import moead
+import sms_emoa
+
+COLORS = moo.NEUTRAL_COLORS + ["Blue", "Green", "Red", "Pink", "Brown"]
+NATIVE_ALGORITHMS = ["nsga2", "spea2", "moead", "moead_batched", "sms_emoa"]
+PYMOO_ALGORITHMS = ["pymoo_nsga2", "pymoo_sms_emoa"]
+RUN_KEYS = ["algorithm", "n_items", "pop_size", "generations", "seed"]
+
+
+def synthetic_wardrobe(n_items, seed=0, top_share=0.55):
+
+    """ Random wardrobe with the same columns and value ranges as data/raw/tops and data/raw/bottoms.
+    Args:
+        n_items (int): total number of clothes
+        seed (int): wardrobe seed, independent of the algorithms' seeds
+        top_share (float): fraction of the items that are tops
+    Returns: (num_tops, num_bottoms, all_clothes_list)
+    """
+
+    rng = np.random.default_rng(seed)
+    num_tops = max(1, min(n_items - 1, int(round(n_items * top_share))))
+    num_bottoms = n_items - num_tops
+
+    def item(name, fit_column):
+        return {
+            "Name": name,
+            "volume": int(rng.integers(1, 5)),
+            "Liking Rating": int(rng.integers(1, 6)),
+            "Color": str(rng.choice(COLORS)),
+            "Patterned?": str(rng.choice(["Yes", "No"])),
+            fit_column: int(rng.integers(1, 4)),
+            "Pajamas?": str(rng.choice(["Yes", "No"])),
+        }
+
+    tops = [item(f"Top {i}", "Length") for i in range(num_tops)]
+    bottoms = [item(f"Bottom {i}", "Highest Rise") for i in range(num_bottoms)]
+    return num_tops, num_bottoms, tops + bottoms
+
+
+def exact_front(num_tops, num_bottoms, all_clothes_list):
+
+    """ True Pareto front of a (small) wardrobe, from the full enumeration of its solution space.
+    Returns: (n, 3) array of distinct non-dominated objective vectors
+    """
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "all_solns.npy")
+        all_solns = np.asarray(moo.enumerate_solution_space(num_tops, num_bottoms, all_clothes_list, path))
+        front = all_solns[moo.non_dominated_mask(all_solns)]
+    return np.unique(front, axis=0)
+
+
+def _run_native(algorithm, wardrobe, pop_size, generations, seed):
+    num_tops, num_bottoms, all_clothes_list = wardrobe
+    n_bits = num_tops + num_bottoms
+    if algorithm == "nsga2":
+        snapshots = nsga2.iterate(
+            moo.evaluate_solution_metrics, num_tops, num_bottoms, all_clothes_list, n_bits,
+            pop_size=pop_size, generations=generations, rng=seed
+        )
+    elif algorithm == "spea2":
+        snapshots = spea2.iterate(
+            n_bits, num_tops, num_bottoms, all_clothes_list, pop_size, pop_size, generations, rng=seed
+        )
+    elif algorithm in ("moead", "moead_batched"):
+        snapshots = moead.MOEAD(
+            n_bits, 3, num_tops, num_bottoms, all_clothes_list, population_size=pop_size,
+            neighborhood_size=min(20, pop_size), max_generations=generations, rng=seed
+        ).iterate("batched" if algorithm == "moead_batched" else "sequential")
+    elif algorithm == "sms_emoa":
+        snapshots = sms_emoa.iterate(
+            n_bits, num_tops, num_bottoms, all_clothes_list, pop_size=pop_size, generations=generations, rng=seed
+        )
+    else:
+        raise ValueError(f"unknown algorithm {algorithm!r}")
+
+    for snapshot in snapshots:
+        pass
+    return snapshot.objectives, snapshot.evaluations
+
+
+def _run_pymoo(algorithm, wardrobe, pop_size, generations, seed):
+    # pymoo is optional: the caller records a skipped run when it is missing
+    from pymoo_problem import WardrobeProblem
+    from pymoo.algorithms.moo.nsga2 import NSGA2
+    from pymoo.algorithms.moo.sms import SMSEMOA
+    from pymoo.operators.sampling.rnd import BinaryRandomSampling
+    from pymoo.operators.crossover.pntx import TwoPointCrossover
+    from pymoo.operators.mutation.bitflip import BitflipMutation
+    from pymoo.optimize import minimize
+
+    operators = dict(sampling=BinaryRandomSampling(), crossover=TwoPointCrossover(prob=0.9), mutation=BitflipMutation(prob=0.02))
+    method = NSGA2(pop_size=pop_size, **operators) if algorithm == "pymoo_nsga2" else SMSEMOA(pop_size=pop_size, **operators)
+    # pymoo's n_gen counts the initial population as generation 1, while the native algorithms run
+    # `generations` generations after it: n_gen = generations + 1 gives both the same evaluation budget
+    res = minimize(WardrobeProblem(*wardrobe), method, ("n_gen", generations + 1), seed=seed, verbose=False)
+    return np.asarray(res.F), res.algorithm.evaluator.n_eval
+
+
+def _run_once(algorithm, wardrobe, pop_size, generations, seed):
+    if algorithm in PYMOO_ALGORITHMS:
+        return _run_pymoo(algorithm, wardrobe, pop_size, generations, seed)
+    return _run_native(algorithm, wardrobe, pop_size, generations, seed)
+
+
+def run_benchmarks(
+    algorithms=NATIVE_ALGORITHMS + PYMOO_ALGORITHMS,
+    n_items_list=(20, 50, 100, 200),
+    pop_sizes=(100,),
+    seeds=(0, 1, 2),
+    generations=100,
+    wardrobe_seed=0,
+    measure_memory=True,
+    exact_front_max_items=20
+):
+
+    """ Runs every algorithm on every synthetic wardrobe size, population size and seed.
+    Wall time comes from an untraced run; with measure_memory, the run is repeated with the same seed under
+    tracemalloc for the peak memory. Recall is measured against the exact front of wardrobes with at most
+    exact_front_max_items items, otherwise against the pooled non-dominated front of all runs on that wardrobe.
+    Returns (list): one dict per run
+    """
+
+    records = []
+    for n_items in n_items_list:
+        wardrobe = synthetic_wardrobe(n_items, wardrobe_seed)
+        ref_point = sms_emoa.default_reference_point(*wardrobe)
+        finals = []
+
+        for algorithm in algorithms:
+            for pop_size in pop_sizes:
+                for seed in seeds:
+                    record = dict(algorithm=algorithm, n_items=n_items, pop_size=pop_size, generations=generations, seed=seed)
+                    try:
+                        start = time.perf_counter()
+                        objectives, evaluations = _run_once(algorithm, wardrobe, pop_size, generations, seed)
+                        wall_time = time.perf_counter() - start
+                    except ImportError as e:
+                        records.append({**record, "status": f"skipped: {e}"})
+                        continue
+
+                    peak = None
+                    if measure_memory:
+                        tracemalloc.start()
+                        _run_once(algorithm, wardrobe, pop_size, generations, seed)
+                        peak = tracemalloc.get_traced_memory()[1] / 2**20
+                        tracemalloc.stop()
+
+                    record.update(
+                        status="ok",
+                        wall_time=wall_time,
+                        evaluations=int(evaluations),
+                        evaluations_per_second=evaluations / wall_time,
+                        peak_memory_mb=peak,
+                        hypervolume=hypervolume(objectives, ref_point),
+                    )
+                    records.append(record)
+                    finals.append((record, objectives))
+
+        if not finals:
+            continue
+        if n_items <= exact_front_max_items:
+            front, kind = exact_front(*wardrobe), "exact"
+        else:
+            pooled = np.concatenate([objectives for _, objectives in finals])
+            front, kind = np.unique(pooled[moo.non_dominated_mask(pooled)], axis=0), "pooled"
+        reference = ReferenceFront(front, ref_point=ref_point)
+        for record, objectives in finals:
+            record.update(
+                reference_front=kind,
+                reference_front_size=len(reference),
+                recall=reference.recovered(objectives) / len(reference),
+                hypervolume_ratio=reference.hypervolume_ratio(objectives),
+                igd_plus=reference.igd_plus(objectives),
+            )
+
+    return records
+
+
+def _time_call(function, repeat=5):
+    # best per-call time over `repeat` rounds of an autoranged number of calls
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number, number
+
+
+def micro_benchmarks(n_items=20, pop_size=200, seed=0, repeat=5):
+
+    """ Per-call timings of the evaluation, sorting and fitness kernels on a synthetic wardrobe.
+    Returns (list): one dict per kernel with its name, problem size and seconds per call
+    """
+
+    num_tops, num_bottoms, all_clothes_list = synthetic_wardrobe(n_items, seed)
+    rng = np.random.default_rng(seed)
+    X = rng.integers(0, 2, size=(pop_size, n_items)).astype(np.uint8)
+    F = moo.evaluate_population(X, num_tops, num_bottoms, all_clothes_list)
+    union = np.concatenate([F, moo.evaluate_population(X ^ 1, num_tops, num_bottoms, all_clothes_list)])
+    union_tuples = [tuple(f) for f in union.tolist()]
+    cloud = pd.DataFrame(rng.integers(0, 100, size=(10000, 3)), columns=["outfits_lost", "volume", "liking_diff"])
+    front = union[moo.non_dominated_mask(union)]
+    ref_point = sms_emoa.default_reference_point(num_tops, num_bottoms, all_clothes_list)
+    tops, bottoms = all_clothes_list[:num_tops], all_clothes_list[num_tops:]
+
+    kernels = [
+        ("evaluate_solution_metrics", 1, lambda: moo.evaluate_solution_metrics(X[0], num_tops, num_bottoms, all_clothes_list)),
+        ("evaluate_solution_metrics_reference", 1, lambda: moo.evaluate_solution_metrics_reference(X[0], num_tops, num_bottoms, all_clothes_list)),
+        ("evaluate_population", pop_size, lambda: moo.evaluate_population(X, num_tops, num_bottoms, all_clothes_list)),
+        ("total_outfits", n_items, lambda: moo.total_outfits(tops, bottoms)),
+        ("pareto_front", len(cloud), lambda: moo.pareto_front(cloud, list(cloud.columns))),
+        ("non_dominated_sort_staircase", len(union), lambda: nondominated_sort.non_dominated_sort(union, "staircase")),
+        ("non_dominated_sort_matrix", len(union), lambda: nondominated_sort.non_dominated_sort(union, "matrix")),
+        ("crowding_distances", len(union), lambda: moo.crowding_distances(union)),
+        ("spea2_strength_and_raw_fitness", len(union), lambda: spea2.compute_strength_and_raw_fitness(union_tuples)),
+        ("spea2_density", len(union), lambda: spea2.compute_density(union_tuples, int(np.sqrt(len(union))))),
+        ("spea2_truncate_archive", len(front), lambda: spea2.truncate_archive(front, max(1, len(front) // 2))),
+        ("hypervolume_3d", len(front), lambda: hypervolume_3d(front, ref_point)),
+    ]
+
+    results = []
+    for name, size, function in kernels:
+        seconds, number = _time_call(function, repeat)
+        results.append(dict(kernel=name, n_items=n_items, size=size, seconds_per_call=seconds, calls_per_round=number))
+    return results
+
+
+def _environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return dict(
+        commit=commit,
+        timestamp=datetime.now(timezone.utc).isoformat(),
+        python=platform.python_version(),
+        numpy=np.__version__,
+        platform=platform.platform(),
+        processor=platform.processor(),
+        cpu_count=os.cpu_count(),
+    )
+
+
+def write_results(path, runs, micro):
+
+    """ Writes the benchmark records, with the commit and machine they came from, to a JSON file. """
+
+    with open(path, "w") as f:
+        json.dump(dict(environment=_environment(), runs=runs, micro=micro), f, indent=1)
+
+
+def load_results(path):
+
+    """ Reads a results file back.
+    Returns: (environment dict, runs DataFrame, micro-benchmark DataFrame)
+    """
+
+    with open(path) as f:
+        results = json.load(f)
+    return results["environment"], pd.DataFrame(results["runs"]), pd.DataFrame(results["micro"])
+
+
+def compare_results(baseline_path, candidate_path):
+
+    """ Lines two results files up, e.g. from two commits.
+    Returns: (runs DataFrame, micro DataFrame), each with the baseline and candidate columns side by side and
+    a speedup column (baseline time / candidate time, so above 1 means the candidate is faster); a table is empty
+    when either file lacks it (--no-runs, --no-micro)
+    """
+
+    _, runs_a, micro_a = load_results(baseline_path)
+    _, runs_b, micro_b = load_results(candidate_path)
+
+    metrics = ["wall_time", "evaluations_per_second", "peak_memory_mb", "hypervolume", "recall"]
+    runs = pd.DataFrame()
+    if len(runs_a) and len(runs_b) and "wall_time" in runs_a and "wall_time" in runs_b:
+        runs = (
+            runs_a.groupby(RUN_KEYS[:-1])[[m for m in metrics if m in runs_a]].median()
+            .join(runs_b.groupby(RUN_KEYS[:-1])[[m for m in metrics if m in runs_b]].median(), lsuffix="_baseline", rsuffix="_candidate", how="inner")
+        )
+        runs["speedup"] = runs["wall_time_baseline"] / runs["wall_time_candidate"]
+
+    # files written with --no-micro have no micro-benchmark table
+    micro = pd.DataFrame()
+    if len(micro_a) and len(micro_b) and "kernel" in micro_a and "kernel" in micro_b:
+        micro = micro_a.merge(micro_b, on=["kernel", "n_items", "size"], suffixes=("_baseline", "_candidate"))
+        micro["speedup"] = micro["seconds_per_call_baseline"] / micro["seconds_per_call_candidate"]
+        micro = micro[["kernel", "n_items", "size", "seconds_per_call_baseline", "seconds_per_call_candidate", "speedup"]]
+    return runs.reset_index(), micro
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the MOO algorithms and evaluation kernels")
+    parser.add_argument("--out", default="benchmark_results.json", help="JSON file to write")
+    parser.add_argument("--algorithms", nargs="+", default=NATIVE_ALGORITHMS + PYMOO_ALGORITHMS)
+    parser.add_argument("--items", nargs="+", type=int, default=[20, 50, 100, 200], help="synthetic wardrobe sizes")
+    parser.add_argument("--pop-sizes", nargs="+", type=int, default=[100])
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0, 1, 2])
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc rerun of each configuration")
+    parser.add_argument("--no-runs", action="store_true", help="micro-benchmarks only")
+    parser.add_argument("--no-micro", action="store_true", help="algorithm runs only")
+    parser.add_argument("--compare", metavar="BASELINE", help="print a comparison against an earlier results file")
+    args = parser.parse_args(argv)
+
+    runs = [] if args.no_runs else run_benchmarks(
+        args.algorithms, args.items, args.pop_sizes, args.seeds, args.generations, measure_memory=not args.no_memory
+    )
+    micro = [] if args.no_micro else micro_benchmarks()
+    write_results(args.out, runs, micro)
+
+    if args.compare:
+        runs_table, micro_table = compare_results(args.compare, args.out)
+        with pd.option_context("display.width", 200, "display.max_columns", None):
+            for table in (runs_table, micro_table):
+                if len(table):
+                    print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
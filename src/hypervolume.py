@@ -0,0 +1,180 @@
+import numpy as np
+from bisect import bisect_left, bisect_right
+
+
+class _AreaStaircase:
+
+    """ 2D staircase (minimization) that also tracks the area it dominates inside the reference box.
+    Points are kept sorted by x with y strictly decreasing; add returns the area gained.
+    """
+
+    def __init__(self, ref_x, ref_y):
+        self.ref_x = ref_x
+        self.ref_y = ref_y
+        self.xs = []
+        self.ys = []
+
+    def add(self, x, y):
+        xs, ys = self.xs, self.ys
+        i = bisect_right(xs, x)
+        if i > 0 and ys[i-1] <= y:
+            return 0
+
+        # walk the steps the new point covers, adding the strip between y and each step's height
+        start = bisect_left(xs, x)
+        ceiling = ys[start-1] if start > 0 else self.ref_y
+        left = x
+        gained = 0
+        j = start
+        while j < len(ys) and ys[j] >= y:
+            gained += (xs[j] - left) * (ceiling - y)
+            left, ceiling = xs[j], ys[j]
+            j += 1
+        right = xs[j] if j < len(xs) else self.ref_x
+        gained += (right - left) * (ceiling - y)
+
+        xs[start:j] = [x]
+        ys[start:j] = [y]
+        return gained
+
+
+def hypervolume_3d(points, ref):
+
+    """ Exact hypervolume of a set of 3-objective points (minimization) with respect to a reference point.
+    Sweeps the points by the third objective while an area staircase holds the dominated region of the
+    first two, so it runs in O(n log n) (plus slice moves in the staircase lists).
+    Args:
+        points: (n, 3) array or list of objective vectors; points not strictly better than ref are ignored
+            (ValueError for any other shape)
+        ref: reference point (length 3)
+    Returns: dominated volume (int for integer inputs)
+    """
+
+    ref = tuple(np.asarray(ref).tolist())
+    points = np.asarray(points)
+    if points.size == 0:
+        return 0
+    if points.ndim != 2 or points.shape[1] != 3 or len(ref) != 3:
+        raise ValueError(f"hypervolume_3d needs (n, 3) points and a length 3 reference point, got {points.shape}")
+    points = points[np.all(points < np.asarray(ref), axis=1)]
+    if len(points) == 0:
+        return 0
+
+    points = points[np.argsort(points[:, 2], kind="stable")]
+    staircase = _AreaStaircase(ref[0], ref[1])
+    volume = 0
+    area = 0
+    previous_z = None
+    for x, y, z in points.tolist():
+        if previous_z is not None:
+            volume += area * (z - previous_z)
+        previous_z = z
+        area += staircase.add(x, y)
+    volume += area * (ref[2] - previous_z)
+    return volume
+
+
+def _exclusive_volume(point, others, ref):
+    # volume only `point` dominates: its box minus the part other points already cover inside it
+    point = np.asarray(point)
+    box = np.prod(np.asarray(ref) - point).item()
+    if box <= 0:
+        return 0
+    if len(others) == 0:
+        return box
+    return box - hypervolume_3d(np.maximum(others, point), ref)
+
+
+def hypervolume_contributions(points, ref):
+
+    """ Exact hypervolume contribution of every point in a 3-objective set (recomputed from scratch).
+    Args:
+        points: (n, 3) array of objective vectors
+        ref: reference point (length 3)
+    Returns: (n,) array of contributions
+    """
+
+    points = np.asarray(points)
+    return np.array([
+        _exclusive_volume(points[i], np.delete(points, i, axis=0), ref) for i in range(len(points))
+    ])
+
+
+class HypervolumeContributions:
+
+    """ Hypervolume contributions of a set of 3-objective points, kept up to date as points come and go.
+
+    Adding or removing a point q only changes the contribution of a member p when the corner max(p, q)
+    is not weakly dominated by any other member: otherwise the box q shares with p was never exclusive to p.
+    Only those members (usually a handful of neighbours of q) are recomputed, each in O(n log n).
+    Finding them is not incremental: every one of the k members whose corner lies inside the reference box is
+    tested against all n members, O(k n) per add or remove and O(n^2) when most members are candidates. That
+    is vectorized and still far cheaper than recomputing all n contributions (O(n^2 log n)).
+    Args:
+        ref: reference point (length 3)
+    """
+
+    def __init__(self, ref):
+        self.ref = np.asarray(ref)
+        self.points = {}
+        self.contributions = {}
+
+    def __len__(self):
+        return len(self.points)
+
+    def __contains__(self, key):
+        return key in self.points
+
+    def _affected(self, point, skip_zero=False):
+        keys = list(self.points)
+        if not keys:
+            return []
+        P = np.array([self.points[k] for k in keys])
+        corners = np.maximum(P, point)
+        candidates = np.flatnonzero(np.all(corners < self.ref, axis=1))
+        if skip_zero:
+            # a contribution can only shrink when a point is added
+            candidates = np.array([c for c in candidates if self.contributions[keys[c]] > 0], dtype=int)
+        if len(candidates) == 0:
+            return []
+
+        covered = np.all(P[None, :, :] <= corners[candidates][:, None, :], axis=2)
+        covered[np.arange(len(candidates)), candidates] = False
+        return [keys[c] for c in candidates[~covered.any(axis=1)]]
+
+    def _recompute(self, key):
+        others = np.array([p for k, p in self.points.items() if k != key]).reshape(-1, len(self.ref))
+        self.contributions[key] = _exclusive_volume(self.points[key], others, self.ref)
+
+    def add(self, key, point):
+
+        """ Adds a point under a hashable key and updates the contributions it affects. """
+
+        point = np.array(point)
+        affected = self._affected(point, skip_zero=True)
+        self.points[key] = point
+        for k in affected:
+            self._recompute(k)
+        self._recompute(key)
+
+    def remove(self, key):
+
+        """ Removes the point stored under key and updates the contributions it affects. """
+
+        point = self.points.pop(key)
+        del self.contributions[key]
+        for k in self._affected(point):
+            self._recompute(k)
+
+    def relabel(self, old_key, new_key):
+
+        """ Moves the point stored under old_key to new_key. """
+
+        self.points[new_key] = self.points.pop(old_key)
+        self.contributions[new_key] = self.contributions.pop(old_key)
+
+    def argmin(self):
+
+        """ Key of the point with the smallest contribution. """
+
+        return min(self.contributions, key=self.contributions.get)
@@ -0,0 +1,151 @@
+import numpy as np
+from scipy.spatial import cKDTree
+from hypervolume import hypervolume_3d
+
+
+def hypervolume(points, ref):
+
+    """ Exact hypervolume of a 2- or 3-objective point set (minimization).
+    3 objectives use the O(n log n) z-sweep of hypervolume.hypervolume_3d; 2 objectives run the same
+    sweep with a flat third objective.
+    Args:
+        points: (n, M) array or list of objective vectors
+        ref: reference point (length M); only points strictly better than it in every objective count
+    Returns: dominated volume (area for 2 objectives)
+    """
+
+    ref = np.asarray(ref)
+    points = np.asarray(points)
+    if points.size == 0:
+        return 0
+    if points.ndim != 2 or points.shape[1] != len(ref):
+        raise ValueError(f"hypervolume needs (n, {len(ref)}) points for this reference point, got {points.shape}")
+    if len(ref) == 2:
+        points = np.column_stack([points, np.zeros(len(points), dtype=points.dtype)])
+        ref = np.append(ref, 1)
+    elif len(ref) != 3:
+        raise ValueError("hypervolume supports 2 or 3 objectives")
+    return hypervolume_3d(points, ref)
+
+
+def _igd_plus_distances(reference, points, block=4096):
+    # for every reference point, the smallest IGD+ distance sqrt(sum(max(a - z, 0)^2)) to any point a;
+    # the modified distance is not a metric, so it is computed in blocks rather than from a tree
+    best = np.empty(len(reference))
+    for start in range(0, len(reference), block):
+        z = reference[start:start + block]
+        d = np.maximum(points[None, :, :] - z[:, None, :], 0)
+        best[start:start + block] = np.sqrt((d ** 2).sum(axis=2).min(axis=1))
+    return best
+
+
+class ReferenceFront:
+
+    """ A reference Pareto front (e.g. full_pareto_front_df) prepared once for repeated indicator calls.
+
+    Keeps a KD-tree over the (scaled) front for GD, its objective vectors as a hashed set for recovery
+    counts and a default hypervolume reference point, so each call only touches the approximation set.
+    Args:
+        front: (n, M) array or list of reference objective vectors
+        ref_point: hypervolume reference point, by default one unit past the front's worst values
+        normalize (bool): measure distances after scaling every objective by the front's range
+    """
+
+    def __init__(self, front, ref_point=None, normalize=True):
+        self.front = np.asarray(front)
+        self.ref_point = self.front.max(axis=0) + 1 if ref_point is None else np.asarray(ref_point)
+        self.offset = self.front.min(axis=0) if normalize else np.zeros(self.front.shape[1])
+        span = self.front.max(axis=0) - self.offset if normalize else np.ones(self.front.shape[1])
+        self.scale = np.where(span > 0, span, 1)
+
+        self.scaled_front = self._scaled(self.front)
+        self.tree = cKDTree(self.scaled_front)
+        self.keys = set(map(tuple, self.front.tolist()))
+        self.front_hypervolume = hypervolume(self.front, self.ref_point)
+
+    def __len__(self):
+        return len(self.front)
+
+    def _scaled(self, points):
+        return (np.asarray(points, dtype=float).reshape(-1, self.front.shape[1]) - self.offset) / self.scale
+
+    def hypervolume(self, points):
+
+        """ Hypervolume of points with respect to the front's reference point. """
+
+        return hypervolume(points, self.ref_point)
+
+    def hypervolume_ratio(self, points):
+
+        """ Hypervolume of points as a fraction of the reference front's own hypervolume. """
+
+        return self.hypervolume(points) / self.front_hypervolume
+
+    def gd(self, points):
+
+        """ Generational distance: mean distance from each point to its nearest reference point. """
+
+        distances, _ = self.tree.query(self._scaled(points))
+        return float(distances.mean())
+
+    def igd(self, points):
+
+        """ Inverted generational distance: mean distance from each reference point to its nearest point. """
+
+        distances, _ = cKDTree(self._scaled(points)).query(self.scaled_front)
+        return float(distances.mean())
+
+    def igd_plus(self, points):
+
+        """ IGD+ (Ishibuchi et al. 2015): IGD with only the objectives a point is worse in counting. """
+
+        return float(_igd_plus_distances(self.scaled_front, self._scaled(points)).mean())
+
+    def recovered(self, points):
+
+        """ Number of distinct reference points whose objective vector appears among points. """
+
+        return len(self.keys.intersection(map(tuple, np.asarray(points).tolist())))
+
+    def summary(self, points):
+
+        """ All indicators at once, e.g. for one row of an algorithm comparison table.
+        Returns (dict): hypervolume, hypervolume_ratio, igd, igd_plus, gd and recovered
+        """
+
+        return {
+            "hypervolume": self.hypervolume(points),
+            "hypervolume_ratio": self.hypervolume_ratio(points),
+            "igd": self.igd(points),
+            "igd_plus": self.igd_plus(points),
+            "gd": self.gd(points),
+            "recovered": self.recovered(points),
+        }
+
+
+def igd(points, front, normalize=True):
+
+    """ Inverted generational distance of points to a reference front (see ReferenceFront.igd). """
+
+    return ReferenceFront(front, normalize=normalize).igd(points)
+
+
+def igd_plus(points, front, normalize=True):
+
+    """ IGD+ of points to a reference front (see ReferenceFront.igd_plus). """
+
+    return ReferenceFront(front, normalize=normalize).igd_plus(points)
+
+
+def gd(points, front, normalize=True):
+
+    """ Generational distance of points to a reference front (see ReferenceFront.gd). """
+
+    return ReferenceFront(front, normalize=normalize).gd(points)
+
+
+def recovered_count(points, front):
+
+    """ Number of distinct reference front points found among points, by hashed objective vectors. """
+
+    return ReferenceFront(front, normalize=False).recovered(points)
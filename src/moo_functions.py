@@ -3,9 +3,21 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import itertools as iter
 import math
+import os
+import json
+import hashlib
+import tempfile
+from collections import OrderedDict, namedtuple
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.preprocessing import MinMaxScaler
 from tqdm import tqdm
 
+NEUTRAL_COLORS = ["White", "Beige", "Black", "Grey"]
+
+# below this many items a full evaluate_population pass is cheaper than incremental (delta) evaluation
+DELTA_EVALUATION_MIN_ITEMS = 48
+
 def total_outfits(tops, bottoms, alternate_occasion=None):
 
     """ Calculates the total number of possible outfits for a given suitcase.
@@ -27,14 +39,301 @@ def total_outfits(tops, bottoms, alternate_occasion=None):
         if alternate_occasion is None or top[alternate_occasion] == "Yes":
             for bottom in bottoms:
                 if alternate_occasion is None or bottom[alternate_occasion] == "Yes":
-                    if not (bottom["Patterned?"] != "No" and top["Patterned?"] != "No"):
-                        if bottom["Color"] in ["White", "Beige", "Black", "Grey"] or top["Color"] in ["White", "Beige", "Black", "Grey"] or bottom["Color"] == top["Color"]:
-                            if top["Length"] - bottom["Highest Rise"] >= 0:
-                                total_num_outfits += 1
-                                top["Matches"].append(bottom["Name"])
-                                bottom["Matches"].append(top["Name"])
+                    if is_match(top, bottom):
+                        total_num_outfits += 1
+                        top["Matches"].append(bottom["Name"])
+                        bottom["Matches"].append(top["Name"])
     return total_num_outfits
 
+def is_match(top, bottom):
+
+    """ Checks whether a top and a bottom can be worn together.
+    Args:
+        top, bottom: clothing info dictionaries
+    Returns (bool): True if the pair follows the pattern, color and length rules
+    """
+
+    if bottom["Patterned?"] != "No" and top["Patterned?"] != "No":
+        return False
+    if not (bottom["Color"] in NEUTRAL_COLORS or top["Color"] in NEUTRAL_COLORS or bottom["Color"] == top["Color"]):
+        return False
+    return top["Length"] - bottom["Highest Rise"] >= 0
+
+
+class CompiledWardrobe:
+
+    """ Array form of a wardrobe, built once so that solutions can be scored without touching the clothing dictionaries.
+
+    Scoring a suitcase becomes a masked sum over the tops x bottoms compatibility matrix plus two dot products,
+    and gives the same metrics as evaluate_solution_metrics. Items are identified by position in all_clothes_list.
+    Occasions (total_outfits' alternate_occasion columns, e.g. "Pajamas?") get their own compatibility matrix,
+    the base one restricted to the items marked "Yes", built on first use; the outfits lost for any number of
+    occasions then come out of the same single matrix product as the base count.
+    Args:
+        num_tops, num_bottoms (int): number of tops and bottoms respectively in original suitcase
+        all_clothes_list (list): List with all original clothing info dictionaries
+    """
+
+    def __init__(self, num_tops, num_bottoms, all_clothes_list):
+        self.num_tops = num_tops
+        self.num_bottoms = num_bottoms
+        self.n_items = num_tops + num_bottoms
+
+        tops = all_clothes_list[:num_tops]
+        bottoms = all_clothes_list[num_tops:num_tops + num_bottoms]
+        items = tops + bottoms
+        self.items = items
+
+        # tops x bottoms outfit rules, evaluated once
+        self.compatibility = np.array(
+            [[is_match(top, bottom) for bottom in bottoms] for top in tops], dtype=bool
+        ).reshape(num_tops, num_bottoms)
+
+        self.volume = np.array([d.get("volume", 0) for d in items])
+
+        # packing an item adds -sign*rating to the liking score, leaving it out adds +sign*rating,
+        # where the sign is +1 for above average (> 2.5) items and -1 for below average ones
+        ratings = np.array([d["Liking Rating"] for d in items])
+        self.liking_weights = np.sign(ratings - 2.5) * ratings
+        if np.issubdtype(ratings.dtype, np.integer):
+            self.liking_weights = self.liking_weights.astype(ratings.dtype)
+
+        # full suitcase totals never change
+        self.total_possible_outfits = int(self.compatibility.sum())
+        self.unpacked_liking = self.liking_weights.sum()
+
+        # compatible partners of every item (bottoms of a top, tops of a bottom) in CSR form:
+        # partners[partner_ptr[i]:partner_ptr[i + 1]] are item i's partners, as item indices
+        match_tops, match_bottoms = np.nonzero(self.compatibility)
+        items = np.concatenate([match_tops, num_tops + match_bottoms])
+        order = np.argsort(items, kind="stable")
+        self.partners = np.concatenate([num_tops + match_bottoms, match_tops])[order]
+        self.partner_ptr = np.concatenate([[0], np.cumsum(np.bincount(items, minlength=self.n_items))])
+
+        self._occasion_compatibility = {}
+        self._stacked_compatibility = {}
+
+    def occasion_compatibility(self, occasion):
+
+        """ Compatibility matrix of an occasion: base outfits whose top and bottom are both marked "Yes" in the
+        occasion column (None is the base case). Built once per occasion.
+        """
+
+        if occasion is None:
+            return self.compatibility
+        matrix = self._occasion_compatibility.get(occasion)
+        if matrix is None:
+            allowed = np.array([d.get(occasion) == "Yes" for d in self.items], dtype=bool)
+            matrix = self.compatibility & allowed[:self.num_tops, None] & allowed[None, self.num_tops:]
+            self._occasion_compatibility[occasion] = matrix
+        return matrix
+
+    def occasion_totals(self, occasions):
+
+        """ Number of outfits the full suitcase can make for each occasion (None is the base case). """
+
+        return np.array([int(self.occasion_compatibility(o).sum()) for o in occasions], dtype=np.int64)
+
+    def outfits_lost(self, X, occasions):
+
+        """ Outfits lost by each solution for several occasions at once (None is the base case).
+        The occasions' compatibility matrices are stacked side by side, so all counts come from one
+        (N, tops) x (tops, K * bottoms) product.
+        Args:
+            X: (N, n_items) array of 0/1 solutions
+            occasions (list): occasion columns, e.g. ["Pajamas?"]
+        Returns: (N, K) int array
+        """
+
+        occasions = tuple(occasions)
+        stacked = self._stacked_compatibility.get(occasions)
+        if stacked is None:
+            stacked = np.hstack([self.occasion_compatibility(o) for o in occasions]).astype(np.int64)
+            self._stacked_compatibility[occasions] = (stacked, self.occasion_totals(occasions))
+        stacked, totals = self._stacked_compatibility[occasions]
+
+        packed = np.asarray(X)[:, :self.n_items] == 1
+        tops, bottoms = packed[:, :self.num_tops], packed[:, self.num_tops:]
+        kept = ((tops @ stacked).reshape(len(packed), len(occasions), self.num_bottoms) * bottoms[:, None, :]).sum(axis=2)
+        return totals - kept
+
+    def objective_bounds(self):
+
+        """ Smallest and largest value each objective can take over all suitcases.
+        Returns: (ideal, nadir) arrays of outfits_lost, volume, liking
+        """
+
+        ideal = np.array([
+            0,
+            self.volume[self.volume < 0].sum(),
+            self.unpacked_liking - 2 * self.liking_weights[self.liking_weights > 0].sum(),
+        ])
+        nadir = np.array([
+            self.total_possible_outfits,
+            self.volume[self.volume > 0].sum(),
+            self.unpacked_liking - 2 * self.liking_weights[self.liking_weights < 0].sum(),
+        ])
+        return ideal, nadir
+
+    def evaluate(self, array, normalize=None, occasions=None):
+
+        """ Generates the three objective metrics for a given solution suitcase.
+        Args:
+            array: Solution array (e.g. [0, 0, 1, 1, 0, 1, ...]
+            normalize (list): Optional, list with the max values for each objective present across all solutions
+            occasions (list): Optional, occasion columns whose outfits lost are appended to the metrics
+        Returns (tuple): num_outfits_lost, total_volume, liking (then one outfits lost count per occasion)
+        """
+
+        if occasions:
+            return tuple(self.evaluate_population(np.asarray(array)[None, :], normalize, occasions)[0].tolist())
+
+        packed = np.asarray(array)[:self.n_items] == 1
+        tops, bottoms = packed[:self.num_tops], packed[self.num_tops:]
+
+        num_outfits_lost = self.total_possible_outfits - int(self.compatibility[tops][:, bottoms].sum())
+        total_volume = self.volume[packed].sum().item()
+        liking = (self.unpacked_liking - 2 * self.liking_weights[packed].sum()).item()
+
+        if normalize:
+            num_outfits_lost = num_outfits_lost / normalize[0]
+            total_volume = total_volume / normalize[1]
+            liking = liking / (normalize[2]*2) + 0.5
+
+        return num_outfits_lost, total_volume, liking
+
+    def evaluate_population(self, X, normalize=None, occasions=None):
+
+        """ Generates the objective metrics for a whole population in one vectorized pass.
+        Args:
+            X: (N, n_items) array of 0/1 solutions
+            normalize (list): Optional, list with the max values for each objective present across all solutions
+            occasions (list): Optional, occasion columns whose outfits lost are appended as extra columns
+        Returns: (N, 3) array with the outfits_lost, volume and liking columns (N, 3 + len(occasions) with occasions)
+        """
+
+        packed = np.asarray(X)[:, :self.n_items] == 1
+        tops, bottoms = packed[:, :self.num_tops], packed[:, self.num_tops:]
+
+        if occasions:
+            lost = self.outfits_lost(packed, [None] + list(occasions))
+        else:
+            lost = (self.total_possible_outfits - ((tops @ self.compatibility.astype(np.int64)) * bottoms).sum(axis=1))[:, None]
+        objectives = np.column_stack([
+            lost[:, 0],
+            packed @ self.volume,
+            self.unpacked_liking - 2 * (packed @ self.liking_weights),
+            lost[:, 1:],
+        ])
+
+        return normalize_objectives(objectives, normalize)
+
+    def evaluate_delta(self, parent, parent_objectives, flipped, normalize=None):
+
+        """ Objective metrics of a child that differs from an already scored parent in a few items.
+        Each flip adds or removes the item's volume and liking weight, and the outfits it forms with its
+        compatible partners that are packed at that point, so the cost is O(flips x degree) instead of
+        O(tops x bottoms).
+        Args:
+            parent: Solution array the child was derived from
+            parent_objectives: unnormalized (num_outfits_lost, total_volume, liking) of parent
+            flipped: indices of the items flipped in parent to obtain the child
+            normalize (list): Optional, list with the max values for each objective present across all solutions
+        Returns (tuple): num_outfits_lost, total_volume, liking of the child
+        """
+
+        packed = np.asarray(parent)[:self.n_items] == 1
+        num_outfits_lost, total_volume, liking = parent_objectives
+        for i in flipped:
+            sign = -1 if packed[i] else 1
+            packed[i] = not packed[i]
+            num_outfits_lost -= sign * int(packed[self.partners[self.partner_ptr[i]:self.partner_ptr[i + 1]]].sum())
+            total_volume += sign * self.volume[i].item()
+            liking -= 2 * sign * self.liking_weights[i].item()
+
+        if normalize:
+            num_outfits_lost = num_outfits_lost / normalize[0]
+            total_volume = total_volume / normalize[1]
+            liking = liking / (normalize[2]*2) + 0.5
+
+        return num_outfits_lost, total_volume, liking
+
+    def evaluate_children(self, parents, parent_objectives, children, normalize=None):
+
+        """ Batched evaluate_delta: scores each child row from the matching parent row and its objectives.
+        The child's kept outfits change by (flipped tops x child's bottoms) + (parent's tops x flipped bottoms),
+        so all flips of all rows are summed at once over the partner lists, in O(total flips x degree).
+        Args:
+            parents: (N, n_items) array of 0/1 solutions
+            parent_objectives: (N, 3) unnormalized objectives of parents
+            children: (N, n_items) array of 0/1 solutions
+            normalize (list): Optional, list with the max values for each objective present across all solutions
+        Returns: (N, 3) array, matching evaluate_population(children)
+        """
+
+        parents = np.asarray(parents)[:, :self.n_items] == 1
+        children = np.asarray(children)[:, :self.n_items] == 1
+        rows, items = np.nonzero(parents != children)
+        sign = np.where(children[rows, items], 1, -1)
+
+        # flipped tops pair with the child's bottoms, flipped bottoms with the parent's tops
+        mixed = np.concatenate([parents[:, :self.num_tops], children[:, self.num_tops:]], axis=1)
+        start = self.partner_ptr[items]
+        degree = self.partner_ptr[items + 1] - start
+        flip = np.repeat(np.arange(len(items)), degree)
+        position = np.arange(degree.sum()) + np.repeat(start - (np.cumsum(degree) - degree), degree)
+        partner_packed = mixed[rows[flip], self.partners[position]]
+        outfits_changed = np.bincount(flip, weights=partner_packed, minlength=len(items))
+
+        N = len(parents)
+        objectives = np.array(parent_objectives, dtype=np.result_type(
+            np.asarray(parent_objectives), self.volume, self.liking_weights
+        ))
+        objectives[:, 0] -= np.bincount(rows, weights=sign * outfits_changed, minlength=N).round().astype(objectives.dtype)
+        objectives[:, 1] += np.bincount(rows, weights=sign * self.volume[items], minlength=N).astype(objectives.dtype)
+        objectives[:, 2] -= 2 * np.bincount(rows, weights=sign * self.liking_weights[items], minlength=N).astype(objectives.dtype)
+
+        return normalize_objectives(objectives, normalize)
+
+
+def normalize_objectives(objectives, normalize=None):
+
+    """ Applies the evaluate_solution_metrics normalization to an (N, 3) objective array.
+    Args:
+        objectives: (N, 3) array of outfits_lost, volume, liking (further occasion columns are left as they are)
+        normalize (list): Optional, list with the max values for each objective present across all solutions
+    Returns: the normalized array, or objectives unchanged if normalize is not given
+    """
+
+    if not normalize:
+        return objectives
+    objectives = np.array(objectives, dtype=float)
+    objectives[:, :3] /= np.array([normalize[0], normalize[1], normalize[2]*2])
+    objectives[:, 2] += 0.5
+    return objectives
+
+
+_compiled_wardrobes = {}
+
+def compile_wardrobe(num_tops, num_bottoms, all_clothes_list):
+
+    """ Returns the CompiledWardrobe for a clothes list, building it on first use.
+    The wardrobe is cached per list object, so edits made to the clothing dictionaries after
+    the first call are not picked up; build a new CompiledWardrobe in that case.
+    Args:
+        num_tops, num_bottoms (int): number of tops and bottoms respectively in original suitcase
+        all_clothes_list (list): List with all original clothing info dictionaries
+    Returns: CompiledWardrobe
+    """
+
+    key = (id(all_clothes_list), num_tops, num_bottoms)
+    cached = _compiled_wardrobes.get(key)
+    # keep a reference to the list so its id can't be reused by another object
+    if cached is None or cached[0] is not all_clothes_list:
+        cached = (all_clothes_list, CompiledWardrobe(num_tops, num_bottoms, all_clothes_list))
+        _compiled_wardrobes[key] = cached
+    return cached[1]
+
 def convert_binary_array_to_item_dicts(array, num_tops, num_bottoms, all_clothes_list):
     
     """ Retrieves the clothing info dictionaries for the clothing times present in a given solution.
@@ -63,7 +362,7 @@ def get_dict_vals(tops, bottoms, key):
     vals = [x for x in [d[key] for d in tops if key in d]] + [x for x in [d[key] for d in bottoms if key in d]]
     return vals
 
-def evaluate_solution_metrics(array, num_tops, num_bottoms, all_clothes_list, normalize=None):
+def evaluate_solution_metrics(array, num_tops, num_bottoms, all_clothes_list, normalize=None, occasions=None):
 
     """ Generates the three objective metrics (outfits_lost, volume, liking_diff) for a given solution suitcase
     Args:
@@ -72,82 +371,848 @@ def evaluate_solution_metrics(array, num_tops, num_bottoms, all_clothes_list, no
         all_clothes_list (list): List with all original clothing info dictionaries
         normalize (list): Optional, to be used if you want to retrieve normalized metrics. Would be a list with the max values
         for each objective present across all solutions.
-    Returns (tuple): num_outfits_lost, total_volume, liking (all ints)
-        
+        occasions (list): Optional, alternate_occasion columns (see occasion_columns) whose number of outfits lost is
+        appended to the metrics, all counted in the same pass
+    Returns (tuple): num_outfits_lost, total_volume, liking (all ints), then one outfits lost count per occasion
+
+    The wardrobe is compiled once per clothes list (see compile_wardrobe), so repeated calls only do array work.
+    """
+
+    return compile_wardrobe(num_tops, num_bottoms, all_clothes_list).evaluate(array, normalize, occasions)
+
+
+def evaluate_population(X, num_tops, num_bottoms, all_clothes_list, normalize=None, occasions=None):
+
+    """ Batched version of evaluate_solution_metrics.
+    Args:
+        X: (N, n_items) array of 0/1 solutions, one solution per row
+        num_tops, num_bottoms (int): number of tops and bottoms respectively in original suitcase
+        all_clothes_list (list): List with all original clothing info dictionaries
+        normalize (list): Optional, list with the max values for each objective present across all solutions
+        occasions (list): Optional, alternate_occasion columns whose outfits lost are appended as extra columns
+    Returns: (N, 3) array (N, 3 + len(occasions) with occasions), each row matching evaluate_solution_metrics
+    """
+
+    return compile_wardrobe(num_tops, num_bottoms, all_clothes_list).evaluate_population(X, normalize, occasions)
+
+
+def occasion_columns(all_clothes_list):
+
+    """ Columns usable as total_outfits' alternate_occasion: Yes / No columns present on every item, except the
+    "Patterned?" style attribute.
+    Args:
+        all_clothes_list (list): List with all original clothing info dictionaries
+    Returns (list): column names, e.g. ["Pajamas?"]
+    """
+
+    columns = [key for key in all_clothes_list[0] if key != "Patterned?"]
+    return [
+        key for key in columns
+        if all(d.get(key) in ("Yes", "No") for d in all_clothes_list)
+    ]
+
+
+def pack_solutions(X):
+
+    """ Packs 0/1 solutions into integer keys, reading each solution as a binary number with the first item
+    as the most significant bit. A key is also the row of that solution in all_solns.npy.
+    Args:
+        X: (N, n_items) array of 0/1 solutions
+    Returns: (N,) uint64 array of keys, or a list of Python ints when n_items > 64
+    """
+
+    X = np.asarray(X) == 1
+    n_items = X.shape[1]
+    if n_items <= 64:
+        powers = np.left_shift(np.uint64(1), np.arange(n_items - 1, -1, -1, dtype=np.uint64))
+        return (X * powers).sum(axis=1, dtype=np.uint64)
+
+    pad = -n_items % 8
+    return [int.from_bytes(row.tobytes(), "big") >> pad for row in np.packbits(X, axis=1)]
+
+
+def unpack_solutions(keys, n_items):
+
+    """ Inverse of pack_solutions for up to 64 items.
+    Args:
+        keys: (N,) array of integer keys
+        n_items (int): number of items per solution
+    Returns: (N, n_items) uint8 array of 0/1 solutions
+    """
+
+    keys = np.asarray(keys, dtype=np.uint64)
+    shifts = np.arange(n_items - 1, -1, -1, dtype=np.uint64)
+    return ((keys[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+class EvaluationCache:
+
+    """ Memoizes solution metrics by packed solution key, so repeated solutions are only scored once.
+
+    One cache can be shared across generations, algorithms and runs on the same wardrobe. Small wardrobes
+    use a dense table directly indexed by the key (2**n_items rows, about 25 MB for 20 items); larger ones use
+    an LRU dictionary bounded by maxsize. Objectives are stored unnormalized and normalized on the way out.
+    Args:
+        num_tops, num_bottoms (int): number of tops and bottoms respectively in original suitcase
+        all_clothes_list (list): List with all original clothing info dictionaries
+        maxsize (int): maximum number of entries kept in LRU mode
+        dense (bool): Optional, force (True) or disable (False) the dense table; by default it is used for up to 20 items
+    """
+
+    def __init__(self, num_tops, num_bottoms, all_clothes_list, maxsize=2**20, dense=None):
+        self.wardrobe = compile_wardrobe(num_tops, num_bottoms, all_clothes_list)
+        n_items = self.wardrobe.n_items
+        self.dense = n_items <= 20 if dense is None else dense
+        self.maxsize = 1 << n_items if self.dense else maxsize
+        self.hits = 0
+        self.misses = 0
+
+        if self.dense:
+            dtype = np.result_type(np.int64, self.wardrobe.volume, self.wardrobe.liking_weights)
+            self._table = np.zeros((1 << n_items, 3), dtype=dtype)
+            self._filled = np.zeros(1 << n_items, dtype=bool)
+        else:
+            self._entries = OrderedDict()
+
+    def __len__(self):
+        return int(self._filled.sum()) if self.dense else len(self._entries)
+
+    def cache_info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self))
+
+    def clear(self):
+        self.hits = 0
+        self.misses = 0
+        if self.dense:
+            self._filled[:] = False
+        else:
+            self._entries.clear()
+
+    def evaluate(self, array, normalize=None):
+
+        """ Cached evaluate_solution_metrics for a single solution.
+        Returns (tuple): num_outfits_lost, total_volume, liking
+        """
+
+        return tuple(self.evaluate_population(np.asarray(array)[None, :], normalize)[0].tolist())
+
+    def evaluate_population(self, X, normalize=None):
+
+        """ Cached evaluate_population: only solutions that were never seen before are scored.
+        Args:
+            X: (N, n_items) array of 0/1 solutions
+            normalize (list): Optional, list with the max values for each objective present across all solutions
+        Returns: (N, 3) objective array
+        """
+
+        X = np.asarray(X)
+        keys = pack_solutions(X)
+
+        if self.dense:
+            missing = ~self._filled[keys]
+            n_new = 0
+            if missing.any():
+                new_keys, first = np.unique(keys[missing], return_index=True)
+                self._table[new_keys] = self.wardrobe.evaluate_population(X[missing][first])
+                self._filled[new_keys] = True
+                n_new = len(new_keys)
+            self.hits += len(keys) - n_new
+            self.misses += n_new
+            return normalize_objectives(self._table[keys], normalize)
+
+        objectives = [None] * len(X)
+        new_rows = {}
+        for i, key in enumerate(keys.tolist() if isinstance(keys, np.ndarray) else keys):
+            objs = self._entries.get(key)
+            if objs is not None:
+                self._entries.move_to_end(key)
+                objectives[i] = objs
+            else:
+                new_rows.setdefault(key, []).append(i)
+        self.hits += len(X) - len(new_rows)
+        self.misses += len(new_rows)
+
+        if new_rows:
+            first_rows = [rows[0] for rows in new_rows.values()]
+            for key, rows, objs in zip(new_rows, new_rows.values(), self.wardrobe.evaluate_population(X[first_rows])):
+                self._entries[key] = objs
+                for i in rows:
+                    objectives[i] = objs
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return normalize_objectives(np.array(objectives), normalize)
+
+
+def population_evaluator(
+    num_tops, num_bottoms, all_clothes_list, cache=None, pareto_archive=None, occasions=None, min_outfits=None
+):
+
+    """ Builds the population scoring function used inside the algorithms.
+    Args:
+        num_tops, num_bottoms (int): number of tops and bottoms respectively in original suitcase
+        all_clothes_list (list): List with all original clothing info dictionaries
+        cache (EvaluationCache): Optional, memoizes solutions across generations and runs
+        pareto_archive (ParetoArchive): Optional, every evaluated solution is fed into it
+        occasions (list): Optional, occasion columns (see occasion_columns) whose outfits lost become extra objectives
+        min_outfits (dict): Optional, minimum number of outfits per occasion column (None for the base case), as
+        constraints: a violating solution gets every objective set past its worst possible value by its total
+        shortfall, so it is dominated by all feasible solutions and by less violating ones. Only feasible solutions
+        are fed into pareto_archive.
+    Returns: function taking an (N, n_items) array and returning its (N, 3) objective array (N, 3 + len(occasions)
+    with occasions). Given the rows' parents and their unnormalized objectives too (e.g. after a mutation-only step),
+    solutions of wardrobes with at least DELTA_EVALUATION_MIN_ITEMS items are scored incrementally with
+    CompiledWardrobe.evaluate_children, unless a cache, occasion columns or min_outfits constraints are used.
+
+    All occasion counts, for objectives and constraints alike, come from the same pass as the base outfit count.
+    """
+
+    wardrobe = compile_wardrobe(num_tops, num_bottoms, all_clothes_list)
+    occasions = list(occasions or [])
+    min_outfits = dict(min_outfits or {})
+    # occasion columns to count: the objectives, then any constrained occasion that is not one
+    counted = occasions + [o for o in min_outfits if o is not None and o not in occasions]
+    # the algorithms hold penalized objectives for infeasible parents, which deltas cannot start from
+    incremental = cache is None and not counted and not min_outfits and wardrobe.n_items >= DELTA_EVALUATION_MIN_ITEMS
+
+    if min_outfits:
+        # largest number of outfits each constrained occasion may lose, and the objective column holding it
+        max_lost = wardrobe.occasion_totals(min_outfits) - np.array(list(min_outfits.values()))
+        columns = [0 if o is None else 3 + counted.index(o) for o in min_outfits]
+        _, nadir = wardrobe.objective_bounds()
+        worst = np.concatenate([nadir, wardrobe.occasion_totals(occasions)]) + 1
+
+    def evaluate(X, parents=None, parent_objectives=None):
+        X = np.asarray(X)
+        if cache is not None:
+            objectives = cache.evaluate_population(X)
+            if counted:
+                objectives = np.column_stack([objectives, wardrobe.outfits_lost(X, counted)])
+        elif incremental and parents is not None:
+            objectives = wardrobe.evaluate_children(parents, parent_objectives, X)
+        else:
+            objectives = wardrobe.evaluate_population(X, occasions=counted)
+
+        feasible = slice(None)
+        if min_outfits:
+            violation = np.maximum(objectives[:, columns] - max_lost, 0).sum(axis=1)
+            feasible = violation == 0
+            objectives = objectives[:, :3 + len(occasions)]
+            objectives = np.where(feasible[:, None], objectives, worst + violation[:, None])
+        if pareto_archive is not None and len(X[feasible]):
+            pareto_archive.add_many(X[feasible], objectives[feasible])
+        return objectives
+
+    return evaluate
+
+
+def _enumerate_chunk(wardrobe, path, chunk, chunk_bits):
+
+    """ Fills rows [chunk * 2**chunk_bits, (chunk + 1) * 2**chunk_bits) of the enumeration file.
+    The leading items are fixed by the chunk number and the last chunk_bits items are walked in
+    Gray-code order, so every step updates the running totals from a single flipped item.
+    """
+
+    n_items = wardrobe.n_items
+    num_tops = wardrobe.num_tops
+    size = 1 << chunk_bits
+
+    # starting suitcase: prefix items from the chunk number, walked items all left out
+    packed = np.array([(chunk >> (n_items - chunk_bits - 1 - i)) & 1 for i in range(n_items - chunk_bits)] + [0] * chunk_bits, dtype=bool)
+    packed_tops = sum(1 << i for i in range(num_tops) if packed[i])
+    packed_bottoms = sum(1 << j for j in range(wardrobe.num_bottoms) if packed[num_tops + j])
+    kept = int(wardrobe.compatibility[packed[:num_tops]][:, packed[num_tops:]].sum())
+    volume = wardrobe.volume[packed].sum().item()
+    weight = wardrobe.liking_weights[packed].sum().item()
+
+    # compatible partners of each item as bitmasks over the other side
+    partners = [sum(1 << j for j in np.flatnonzero(row)) for row in wardrobe.compatibility]
+    partners += [sum(1 << i for i in np.flatnonzero(col)) for col in wardrobe.compatibility.T]
+    volumes = wardrobe.volume.tolist()
+    weights = wardrobe.liking_weights.tolist()
+
+    kept_col = [kept] * size
+    volume_col = [volume] * size
+    weight_col = [weight] * size
+
+    # Gray code g(t) = t ^ (t >> 1) flips the lowest set bit of t at step t; bit p is item n_items - 1 - p
+    g = 0
+    for t in range(1, size):
+        p = (t & -t).bit_length() - 1
+        g ^= 1 << p
+        item = n_items - 1 - p
+        adding = not packed[item]
+        packed[item] = adding
+        sign = 1 if adding else -1
+
+        if item < num_tops:
+            kept += sign * (partners[item] & packed_bottoms).bit_count()
+            packed_tops ^= 1 << item
+        else:
+            kept += sign * (partners[item] & packed_tops).bit_count()
+            packed_bottoms ^= 1 << (item - num_tops)
+        volume += sign * volumes[item]
+        weight += sign * weights[item]
+
+        kept_col[g] = kept
+        volume_col[g] = volume
+        weight_col[g] = weight
+
+    out = np.lib.format.open_memmap(path, mode="r+")
+    rows = out[chunk * size:(chunk + 1) * size]
+    rows[:, 0] = wardrobe.total_possible_outfits - np.array(kept_col)
+    rows[:, 1] = volume_col
+    rows[:, 2] = wardrobe.unpacked_liking - 2 * np.array(weight_col)
+    out.flush()
+    del out
+
+
+def enumerate_solution_space(num_tops, num_bottoms, all_clothes_list, path, chunk_bits=16, max_workers=None):
+
+    """ Evaluates every possible suitcase and streams the metrics to a .npy file.
+
+    Rows follow itertools.product([0, 1], repeat=n_items) order (row index = solution read as a binary number,
+    first item as the most significant bit), which is the layout of all_solns.npy, and the file is byte-for-byte
+    what np.save writes for the metrics DataFrame. The space is split into
+    2**(n_items - chunk_bits) chunks that are filled in parallel by a process pool and written straight
+    into the memory-mapped output, so the full table is never held in memory.
+    Args:
+        num_tops, num_bottoms (int): number of tops and bottoms respectively in original suitcase
+        all_clothes_list (list): List with all original clothing info dictionaries
+        path (str): output .npy file
+        chunk_bits (int): number of items walked inside each chunk (chunks hold 2**chunk_bits solutions)
+        max_workers (int): Optional, number of worker processes (defaults to the cpu count, 1 runs in this process)
+    Returns: read-only memory map of the (2**n_items, 3) outfits_lost, volume, liking array
+    """
+
+    wardrobe = compile_wardrobe(num_tops, num_bottoms, all_clothes_list)
+    n_items = wardrobe.n_items
+    chunk_bits = min(chunk_bits, n_items)
+    n_chunks = 1 << (n_items - chunk_bits)
+
+    dtype = np.result_type(np.int64, wardrobe.volume, wardrobe.liking_weights)
+    # column-major like the np.save of the metrics DataFrame, so each chunk writes three contiguous runs
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(1 << n_items, 3), fortran_order=True)
+    del out
+
+    max_workers = max_workers or os.cpu_count()
+    with tqdm(total=n_chunks, desc="Processing items") as pbar:
+        if max_workers == 1 or n_chunks == 1:
+            for chunk in range(n_chunks):
+                _enumerate_chunk(wardrobe, path, chunk, chunk_bits)
+                pbar.update(1)
+        else:
+            with ProcessPoolExecutor(max_workers=min(max_workers, n_chunks)) as pool:
+                jobs = [pool.submit(_enumerate_chunk, wardrobe, path, chunk, chunk_bits) for chunk in range(n_chunks)]
+                for job in jobs:
+                    job.result()
+                    pbar.update(1)
+
+    return np.load(path, mmap_mode="r")
+
+
+STORE_MAGIC = b"MOOSTORE"
+STORE_COLUMNS = ["outfits_lost", "volume", "liking_diff"]
+_STORE_ALIGN = 64
+
+
+def wardrobe_hash(num_tops, num_bottoms, all_clothes_list):
+
+    """ Short fingerprint of a wardrobe, stored in solution store headers to catch stores opened with the wrong clothes.
+    The "Matches" lists that total_outfits writes into the dictionaries are ignored.
+    Args:
+        num_tops, num_bottoms (int): number of tops and bottoms respectively in original suitcase
+        all_clothes_list (list): List with all original clothing info dictionaries
+    Returns (str): 16 hex digits
+    """
+
+    items = [{k: v for k, v in d.items() if k != "Matches"} for d in all_clothes_list[:num_tops + num_bottoms]]
+    text = json.dumps([num_tops, num_bottoms, items], sort_keys=True, default=lambda v: v.item() if hasattr(v, "item") else str(v))
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def _store_data_start(header_size):
+    # the columns start at the first aligned offset after the magic, the header length and the header
+    return -(-(len(STORE_MAGIC) + 4 + header_size) // _STORE_ALIGN) * _STORE_ALIGN
+
+
+class SolutionStore:
+
+    """ Columnar, memory-mapped table of suitcases and their metrics (see save_solution_store / load_solution_store).
+
+    Each solution is stored as its pack_solutions key (uint32 up to 32 items, uint64 up to 64) and each objective as
+    its own int16 column (int32 when the values do not fit), so slicing a column or a row range reads only those bytes.
+    Args:
+        path (str): store file
+        mode (str): np.memmap mode, "r" (default) or "r+"
+    """
+
+    def __init__(self, path, mode="r"):
+        with open(path, "rb") as f:
+            if f.read(len(STORE_MAGIC)) != STORE_MAGIC:
+                raise ValueError(f"{path} is not a solution store")
+            header_size = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+            self.header = json.loads(f.read(header_size))
+
+        self.path = path
+        start = _store_data_start(header_size)
+        n = self.header["rows"]
+        offsets = self.header["offsets"]
+        self.keys = np.memmap(path, dtype=self.header["key_dtype"], mode=mode, offset=start + offsets["key"], shape=(n,))
+        self.columns = {
+            name: np.memmap(path, dtype=self.header["objective_dtype"], mode=mode, offset=start + offsets[name], shape=(n,))
+            for name in self.header["columns"]
+        }
+
+    def __len__(self):
+        return self.header["rows"]
+
+    @property
+    def n_items(self):
+        return self.header["n_items"]
+
+    @property
+    def normalize(self):
+
+        """ Largest absolute value of each objective, the normalize list evaluate_solution_metrics expects. """
+
+        return self.header["normalize"]
+
+    def check_wardrobe(self, num_tops, num_bottoms, all_clothes_list):
+
+        """ Raises ValueError if the store was written for a different wardrobe. """
+
+        if self.header["wardrobe_hash"] != wardrobe_hash(num_tops, num_bottoms, all_clothes_list):
+            raise ValueError(f"{self.path} was written for a different wardrobe")
+
+    def objectives(self, rows=slice(None)):
+
+        """ (k, 3) array of the objectives of the selected rows (a slice, index array or boolean mask). """
+
+        return np.column_stack([self.columns[name][rows] for name in self.header["columns"]])
+
+    def solutions(self, rows=slice(None)):
+
+        """ (k, n_items) 0/1 suitcases of the selected rows, decoded from their keys. """
+
+        return unpack_solutions(self.keys[rows], self.n_items)
+
+    def rows_of(self, solutions):
+
+        """ Rows holding the given suitcases ((k, n_items) 0/1 array), -1 where a suitcase is not in the store.
+        A full-space store is indexed by key directly; other stores are searched by key.
+        """
+
+        keys = np.asarray(pack_solutions(solutions), dtype=self.keys.dtype)
+        if self.header["full_space"]:
+            return keys.astype(np.int64)
+        order = None if self.header["sorted"] else np.argsort(self.keys, kind="stable")
+        sorted_keys = self.keys if order is None else self.keys[order]
+        pos = np.minimum(np.searchsorted(sorted_keys, keys), max(len(self) - 1, 0))
+        found = (len(self) > 0) & (sorted_keys[pos] == keys)
+        rows = pos if order is None else order[pos]
+        return np.where(found, rows, -1)
+
+    def to_dataframe(self, rows=slice(None), with_solutions=False):
+
+        """ The selected rows as a DataFrame with the objective columns (and the 0/1 item columns if with_solutions). """
+
+        df = pd.DataFrame(self.objectives(rows), columns=self.header["columns"])
+        if with_solutions:
+            items = pd.DataFrame(self.solutions(rows), columns=[f"item_{i}" for i in range(self.n_items)])
+            df = pd.concat([items, df], axis=1)
+        return df
+
+
+def save_solution_store(path, solutions, objectives, num_tops, num_bottoms, all_clothes_list, chunk_rows=1 << 20):
+
+    """ Writes suitcases and their metrics to a columnar solution store file (see SolutionStore).
+
+    Layout: STORE_MAGIC, a little-endian uint32 header length, a JSON header (row count, item counts, wardrobe_hash,
+    dtypes, per-column byte offsets, objective minima / maxima and the normalize list), then the key column and one
+    column per objective, each starting on a 64-byte boundary. 2**20 suitcases of 20 items take 10 MB.
+    Args:
+        path (str): output file
+        solutions: (N, n_items) array of 0/1 solutions, or (N,) array of their pack_solutions keys
+        objectives: (N, 3) array of integer outfits_lost, volume, liking (e.g. the memory map from
+            enumerate_solution_space); float arrays are accepted only if every value is integral
+        num_tops, num_bottoms (int): number of tops and bottoms respectively in original suitcase
+        all_clothes_list (list): List with all original clothing info dictionaries
+        chunk_rows (int): rows converted at a time, so memory-mapped inputs are never loaded whole
+    Returns: SolutionStore opened on the new file
+    """
+
+    n_items = num_tops + num_bottoms
+    if n_items > 64:
+        raise ValueError("solution stores support at most 64 items")
+    solutions = np.asarray(solutions)
+    keys = pack_solutions(solutions) if solutions.ndim == 2 else solutions.astype(np.uint64)
+    if not hasattr(objectives, "shape"):
+        objectives = np.asarray(objectives)
+    n = len(keys)
+
+    # the objective columns are integer counts: refuse normalized (or otherwise fractional) objectives
+    # rather than truncate them
+    if not np.issubdtype(objectives.dtype, np.integer):
+        for lo in range(0, n, chunk_rows):
+            block = np.asarray(objectives[lo:lo + chunk_rows])
+            if not np.all(np.isfinite(block) & (block == np.round(block))):
+                raise ValueError("solution stores hold integer objectives; pass the raw, unnormalized objectives")
+
+    minima = np.asarray(objectives[:].min(axis=0) if n else np.zeros(3), dtype=np.int64)
+    maxima = np.asarray(objectives[:].max(axis=0) if n else np.zeros(3), dtype=np.int64)
+    key_dtype = np.dtype("<u4" if n_items <= 32 else "<u8")
+    int16 = np.iinfo(np.int16)
+    objective_dtype = np.dtype("<i2" if minima.min() >= int16.min and maxima.max() <= int16.max else "<i4")
+
+    offsets = {"key": 0}
+    end = -(-n * key_dtype.itemsize // _STORE_ALIGN) * _STORE_ALIGN
+    for name in STORE_COLUMNS:
+        offsets[name] = end
+        end += -(-n * objective_dtype.itemsize // _STORE_ALIGN) * _STORE_ALIGN
+
+    sorted_keys = bool(n == 0 or np.all(keys[1:] > keys[:-1]))
+    header = json.dumps(dict(
+        version=1,
+        rows=n,
+        n_items=n_items,
+        num_tops=num_tops,
+        num_bottoms=num_bottoms,
+        wardrobe_hash=wardrobe_hash(num_tops, num_bottoms, all_clothes_list),
+        key_dtype=key_dtype.str,
+        objective_dtype=objective_dtype.str,
+        columns=STORE_COLUMNS,
+        offsets=offsets,
+        minima=minima.tolist(),
+        maxima=maxima.tolist(),
+        normalize=np.maximum(np.abs(minima), np.abs(maxima)).tolist(),
+        sorted=sorted_keys,
+        full_space=bool(sorted_keys and n == 1 << n_items and (n == 0 or keys[-1] == n - 1)),
+    )).encode()
+
+    start = _store_data_start(len(header))
+    with open(path, "wb") as f:
+        f.write(STORE_MAGIC)
+        f.write(np.uint32(len(header)).astype("<u4").tobytes())
+        f.write(header)
+        f.truncate(start + end)
+
+    store = SolutionStore(path, mode="r+")
+    for lo in range(0, n, chunk_rows):
+        hi = min(lo + chunk_rows, n)
+        store.keys[lo:hi] = keys[lo:hi]
+        block = np.asarray(objectives[lo:hi])
+        for j, name in enumerate(STORE_COLUMNS):
+            store.columns[name][lo:hi] = block[:, j]
+    store.keys.flush()
+    for column in store.columns.values():
+        column.flush()
+    return load_solution_store(path)
+
+
+def load_solution_store(path, num_tops=None, num_bottoms=None, all_clothes_list=None):
+
+    """ Opens a solution store read-only; nothing is read until a column is sliced.
+    Args:
+        path (str): store file written by save_solution_store or store_solution_space
+        num_tops, num_bottoms, all_clothes_list: Optional, the wardrobe the store must have been written for
+    Returns: SolutionStore
+    """
+
+    store = SolutionStore(path)
+    if all_clothes_list is not None:
+        store.check_wardrobe(num_tops, num_bottoms, all_clothes_list)
+    return store
+
+
+def store_solution_space(num_tops, num_bottoms, all_clothes_list, path, chunk_bits=16, max_workers=None):
+
+    """ Enumerates every suitcase (enumerate_solution_space) into a solution store, keeping the decision vectors:
+    row k is the suitcase with key k.
+    Args:
+        num_tops, num_bottoms (int): number of tops and bottoms respectively in original suitcase
+        all_clothes_list (list): List with all original clothing info dictionaries
+        path (str): output store file
+        chunk_bits, max_workers: see enumerate_solution_space
+    Returns: SolutionStore
+    """
+
+    n_items = num_tops + num_bottoms
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as tmp:
+        objectives = enumerate_solution_space(
+            num_tops, num_bottoms, all_clothes_list, os.path.join(tmp, "all_solns.npy"), chunk_bits, max_workers
+        )
+        store = save_solution_store(
+            path, np.arange(1 << n_items, dtype=np.uint64), objectives, num_tops, num_bottoms, all_clothes_list
+        )
+        del objectives
+    return store
+
+
+def evaluate_solution_metrics_reference(array, num_tops, num_bottoms, all_clothes_list, normalize=None):
+
+    """ Dictionary-based version of evaluate_solution_metrics, kept as the reference implementation
+    the compiled wardrobe is checked against (tests/test_moo_functions.py). Same arguments and return values.
     """
 
     tops, bottoms = convert_binary_array_to_item_dicts(array, num_tops, num_bottoms, all_clothes_list)
 
-    
     # a solution that removes more outfits compared to the full suitcase will be penalized
     total_possible_outfits = total_outfits(all_clothes_list[:num_tops], all_clothes_list[num_tops:])
     num_outfits_lost = total_possible_outfits - total_outfits(tops, bottoms)
     if normalize:
         num_outfits_lost = num_outfits_lost / normalize[0]
 
-
-    
     # a solution with highest volume will be penalized
     total_volume = sum([d["volume"] for d in tops if "volume" in d]) + sum([d["volume"] for d in bottoms if "volume" in d])
     if normalize:
         total_volume = total_volume / normalize[1]
 
-    
-
-    # a solution that removes better items or includes worse items will be penalized
-    # likings = get_dict_vals(tops, bottoms, "Liking Rating")
-    # relative_likings = [x-abs(min(likings)) for x in likings]
-
-    # full_suitcase_likings = get_dict_vals(all_clothes_list[:num_tops], all_clothes_list[num_tops:], "Liking Rating")
-    # bonus_liking = sum([x-abs(min(full_suitcase_likings)) for x in full_suitcase_likings])
-
-    # liking_diff = bonus_liking - sum(relative_likings)
-    # #liking_diff = 10 - (sum(liking_diff) / len(liking_diff))
-
     # a solution that removes better items or includes worse items will be penalized
     # where "better" items are above average and "worse" are below average
+    packed = [x["Name"] for x in tops + bottoms]
     liking = 0
-    for i in range(0, len(all_clothes_list)):
-        if all_clothes_list[i]["Name"] in [x["Name"] for x in tops+bottoms]: # if they have it
-            if all_clothes_list[i]["Liking Rating"] > 2.5:
-                liking -= all_clothes_list[i]["Liking Rating"]
-            elif all_clothes_list[i]["Liking Rating"] < 2.5:
-                liking += all_clothes_list[i]["Liking Rating"]
-        elif all_clothes_list[i]["Name"] not in [x["Name"] for x in tops+bottoms]: # if they dont have it
-            if all_clothes_list[i]["Liking Rating"] > 2.5:
-                liking += all_clothes_list[i]["Liking Rating"]
-            elif all_clothes_list[i]["Liking Rating"] < 2.5:
-                liking -= all_clothes_list[i]["Liking Rating"]
+    for item in all_clothes_list:
+        if item["Name"] in packed:
+            if item["Liking Rating"] > 2.5:
+                liking -= item["Liking Rating"]
+            elif item["Liking Rating"] < 2.5:
+                liking += item["Liking Rating"]
+        else:
+            if item["Liking Rating"] > 2.5:
+                liking += item["Liking Rating"]
+            elif item["Liking Rating"] < 2.5:
+                liking -= item["Liking Rating"]
     if normalize:
-        #liking = (liking + normalize[2]) / normalize[2]
         liking = liking / (normalize[2]*2) + 0.5
-        
-    
+
     return num_outfits_lost, total_volume, liking
 
 
+class Staircase:
+
+    """ Non-dominated set of 2D points (minimization), kept as parallel lists sorted by x with y strictly decreasing.
+    Used as the sweep structure of the sort-based Pareto filters. dominates is an O(log n) binary search; insert
+    finds its position the same way, but splices the lists, an O(n) memmove in the worst case.
+    """
+
+    def __init__(self):
+        self.xs = []
+        self.ys = []
+
+    def __len__(self):
+        return len(self.xs)
+
+    def dominates(self, x, y):
+        # the point with the largest x <= x has the smallest y among all candidates
+        i = bisect_right(self.xs, x)
+        return i > 0 and self.ys[i-1] <= y
+
+    def insert(self, x, y):
+        # drop the points (x, y) dominates, which sit in one run right after its position
+        i = bisect_left(self.xs, x)
+        j = i
+        while j < len(self.ys) and self.ys[j] >= y:
+            j += 1
+        self.xs[i:j] = [x]
+        self.ys[i:j] = [y]
+
+
+def non_dominated_mask(data):
+
+    """ Marks the rows of an objective array that no other row dominates (minimization).
+    Identical objective vectors are collapsed up front, so ties are only compared once and all
+    copies of a non-dominated vector are kept. 1 and 2 objectives take O(n log n) (a running-minimum sweep
+    for two); three objectives sweep the lexicographically sorted vectors with a Staircase of the (f2, f3)
+    points seen so far (Kung et al.), which does O(n log n) comparisons but whose list splices make the worst
+    case O(n^2) element moves (memmoves, cheap next to the sort until n is in the millions).
+    Args:
+        data: (n, M) array of objective values
+    Returns: boolean array, True for the non-dominated rows
+    """
+
+    data = np.asarray(data)
+    if len(data) == 0:
+        return np.zeros(0, dtype=bool)
+
+    # np.unique sorts the vectors lexicographically, so every row can only be dominated by earlier ones
+    unique, inverse = np.unique(data, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    n_obj = unique.shape[1]
+
+    if n_obj == 1:
+        non_dominated = np.arange(len(unique)) == 0
+    elif n_obj == 2:
+        best_before = np.concatenate([[np.inf], np.minimum.accumulate(unique[:-1, 1])])
+        non_dominated = unique[:, 1] < best_before
+    elif n_obj == 3:
+        non_dominated = np.zeros(len(unique), dtype=bool)
+        staircase = Staircase()
+        for i, (_, y, z) in enumerate(unique.tolist()):
+            if not staircase.dominates(y, z):
+                non_dominated[i] = True
+                staircase.insert(y, z)
+    else:
+        non_dominated = np.ones(len(unique), dtype=bool)
+        for start in range(0, len(unique), 1024):
+            block = unique[start:start+1024]
+            dominated = (
+                np.all(unique[None, :, :] <= block[:, None, :], axis=2) &
+                np.any(unique[None, :, :] < block[:, None, :], axis=2)
+            ).any(axis=1)
+            non_dominated[start:start+1024] = ~dominated
+
+    return non_dominated[inverse]
+
+
 def pareto_front(df, cols):
     """ Find the Pareto front for given data
     Args:
         df: dataframe
         cols (list): list of the column names to be consider in pareto calculation
+    Returns: the rows of df that are not dominated on cols, in their original order
     """
+
+    return df.loc[non_dominated_mask(df[cols].values)]
     
-    data = df[cols].values
-    is_dominated = np.zeros(len(data), dtype=bool)
-
-    with tqdm(total=len(data), desc="Processing items") as pbar:
-        for i, x in enumerate(data):
-                
-            if np.any(
-                np.all(data <= x, axis=1) &
-                np.any(data < x, axis=1)
-            ):
-                is_dominated[i] = True
-            pbar.update(1)
-
-    return df.loc[~is_dominated]
-    
+
+def crowding_distances(objectives):
+
+    """ NSGA-II crowding distance of every row of an objective array.
+    Args:
+        objectives: (n, M) array of objective values
+    Returns: (n,) float array, inf for the boundary points of each objective
+    """
+
+    objectives = np.asarray(objectives, dtype=float)
+    distances = np.zeros(len(objectives))
+    if len(objectives) == 0:
+        return distances
+
+    for m in range(objectives.shape[1]):
+        order = np.argsort(objectives[:, m], kind="stable")
+        values = objectives[order, m]
+        distances[order[0]] = np.inf
+        distances[order[-1]] = np.inf
+
+        if values[-1] == values[0]:
+            continue
+
+        distances[order[1:-1]] += (values[2:] - values[:-2]) / (values[-1] - values[0])
+
+    return distances
+
+
+class ParetoArchive:
+
+    """ Best-ever non-dominated set of evaluated solutions (minimization).
+
+    Members are kept sorted by their first objective, so a new point only has to be checked against the
+    members with a smaller-or-equal first objective (could dominate it) and those with a larger-or-equal
+    one (could be dominated by it); both slices are found by binary search and compared in one
+    vectorized step. Objective vectors that are already in the archive are rejected, so the first
+    solution found for each point is the one kept.
+    add is O(n) per call, not O(log n): the slice comparisons are linear in the worst case, and an
+    accepted point is spliced in with np.insert / np.delete, which copy both arrays. For many points at
+    once use add_many, one O(n log n) merge per batch.
+    Args:
+        max_size (int): Optional bound on the archive size. When exceeded, the member with the smallest
+        crowding distance is evicted until the archive fits.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.solutions = None
+        self.objectives = None
+
+    def __len__(self):
+        return 0 if self.objectives is None else len(self.objectives)
+
+    def add(self, solution, objectives):
+
+        """ Inserts one solution if no archive member weakly dominates it.
+        Args:
+            solution: decision vector (e.g. [0, 0, 1, 1, 0, 1, ...]
+            objectives: its objective values
+        Returns (bool): True if the solution was added
+        """
+
+        solution = np.asarray(solution)
+        objectives = np.asarray(objectives)
+        if self.objectives is None:
+            self.solutions = solution[None, :].copy()
+            self.objectives = objectives[None, :].copy()
+            return True
+
+        first = self.objectives[:, 0]
+        hi = np.searchsorted(first, objectives[0], side="right")
+        if np.any(np.all(self.objectives[:hi] <= objectives, axis=1)):
+            return False
+
+        lo = np.searchsorted(first, objectives[0], side="left")
+        dominated = lo + np.flatnonzero(np.all(self.objectives[lo:] >= objectives, axis=1))
+        self.objectives = np.insert(np.delete(self.objectives, dominated, axis=0), lo, objectives, axis=0)
+        self.solutions = np.insert(np.delete(self.solutions, dominated, axis=0), lo, solution, axis=0)
+
+        self._truncate()
+        return True
+
+    def add_many(self, solutions, objectives):
+
+        """ Inserts a batch of solutions, e.g. all the children evaluated in one generation.
+        Args:
+            solutions: (N, n_items) array of decision vectors
+            objectives: (N, M) array of their objective values
+        Returns (int): number of solutions from the batch that are in the archive afterwards
+        """
+
+        solutions = np.asarray(solutions)
+        objectives = np.asarray(objectives)
+        if len(objectives) == 0:
+            return 0
+
+        if self.objectives is None:
+            merged_solutions, merged_objectives = solutions, objectives
+        else:
+            merged_solutions = np.concatenate([self.solutions, solutions])
+            merged_objectives = np.concatenate([self.objectives, objectives])
+        n_old = len(merged_objectives) - len(objectives)
+
+        keep = non_dominated_mask(merged_objectives)
+        # one member per objective vector, current members first
+        _, first_seen = np.unique(merged_objectives, axis=0, return_index=True)
+        unique_rows = np.zeros(len(keep), dtype=bool)
+        unique_rows[first_seen] = True
+        keep &= unique_rows
+
+        order = np.flatnonzero(keep)
+        order = order[np.argsort(merged_objectives[order, 0], kind="stable")]
+        self.solutions = merged_solutions[order]
+        self.objectives = merged_objectives[order]
+
+        added = self._truncate(order >= n_old)
+        return int(np.count_nonzero(added))
+
+    def _truncate(self, flags=None):
+        # evict the most crowded member until the size bound holds, dropping the same rows from flags
+        while self.max_size is not None and len(self) > self.max_size:
+            evict = np.argmin(crowding_distances(self.objectives))
+            self.solutions = np.delete(self.solutions, evict, axis=0)
+            self.objectives = np.delete(self.objectives, evict, axis=0)
+            if flags is not None:
+                flags = np.delete(flags, evict)
+        return flags
+
+    def to_dataframe(self, columns=("outfits_lost", "volume", "liking_diff")):
+
+        """ Returns the archived objective values as a DataFrame (empty if nothing was added). """
+
+        if self.objectives is None:
+            return pd.DataFrame(columns=list(columns))
+        return pd.DataFrame(self.objectives, columns=list(columns))
+
 
 def liking_shift(df):
     # shifts the liking_diff column from a range of (-75, 75) to (0, 150) for visualization purposes if necessary
@@ -0,0 +1,127 @@
+import numpy as np
+from pymoo.core.problem import Problem, ElementwiseProblem
+import moo_functions as moo
+
+# pymoo adapters for the suitcase problem: one variable per clothing item (tops first, then bottoms),
+# rounded to 0/1 at 0.5, and the three minimized objectives outfits_lost, volume, liking. Occasion columns
+# (moo_functions.occasion_columns) can add one outfits_lost objective each, and minimum outfit counts per
+# occasion become pymoo inequality constraints; all of them are counted in the same pass as the base objectives.
+
+
+class _WardrobeMixin:
+
+    def _setup(self, num_tops, num_bottoms, all_clothes_list, cache, normalize, occasions, min_outfits):
+        self.num_tops = num_tops
+        self.num_bottoms = num_bottoms
+        self.wardrobe = moo.compile_wardrobe(num_tops, num_bottoms, all_clothes_list)
+        self.cache = cache
+        self.normalize = normalize
+        self.occasions = list(occasions or [])
+        self.min_outfits = dict(min_outfits or {})
+
+        # occasion columns to count: the objectives, then any constrained occasion that is not one
+        self._counted = self.occasions + [o for o in self.min_outfits if o is not None and o not in self.occasions]
+        self._constraint_columns = [0 if o is None else 3 + self._counted.index(o) for o in self.min_outfits]
+        self._max_lost = self.wardrobe.occasion_totals(self.min_outfits) - np.array(list(self.min_outfits.values()), dtype=int)
+        return dict(
+            n_var=self.wardrobe.n_items, n_obj=3 + len(self.occasions), n_ieq_constr=len(self.min_outfits), xl=0.0, xu=1.0
+        )
+
+    @classmethod
+    def from_data(cls, tops, bottoms, **kwargs):
+
+        """ Builds the problem from the tops and bottoms record lists (e.g. DataFrame.to_dict(orient='records')). """
+
+        return cls(len(tops), len(bottoms), list(tops) + list(bottoms), **kwargs)
+
+    def _scores(self, X):
+        # objectives and constraint values (outfits lost beyond each occasion's allowance, <= 0 when satisfied)
+        X = (np.asarray(X) > 0.5).astype(np.uint8).reshape(-1, self.wardrobe.n_items)
+        if self.cache is not None:
+            F = self.cache.evaluate_population(X)
+            if self._counted:
+                F = np.column_stack([F, self.wardrobe.outfits_lost(X, self._counted)])
+        else:
+            F = self.wardrobe.evaluate_population(X, occasions=self._counted)
+        G = F[:, self._constraint_columns] - self._max_lost
+        return moo.normalize_objectives(F[:, :3 + len(self.occasions)], self.normalize), G
+
+
+class WardrobeProblem(_WardrobeMixin, Problem):
+
+    """ Vectorized pymoo Problem: every generation's whole X matrix is scored in one evaluate_population pass.
+
+    Sized from the wardrobe (n_var = num_tops + num_bottoms, n_obj = 3 + len(occasions)), so it works with pymoo's binary
+    operators (BinaryRandomSampling, TwoPointCrossover, BitflipMutation) as well as with real-valued ones
+    such as CMOPSO and MOPSO-CD.
+    Args:
+        num_tops, num_bottoms (int): number of tops and bottoms respectively in original suitcase
+        all_clothes_list (list): List with all original clothing info dictionaries
+        cache (EvaluationCache): Optional, memoizes solutions across generations and runs
+        normalize (list): Optional, list with the max values for each objective present across all solutions
+        occasions (list): Optional, occasion columns whose outfits lost are added as objectives
+        min_outfits (dict): Optional, {occasion column (None for the base case): minimum outfits} constraints
+    """
+
+    def __init__(
+        self, num_tops, num_bottoms, all_clothes_list, cache=None, normalize=None, occasions=None, min_outfits=None,
+        **kwargs
+    ):
+        super().__init__(
+            **self._setup(num_tops, num_bottoms, all_clothes_list, cache, normalize, occasions, min_outfits), **kwargs
+        )
+
+    def _evaluate(self, X, out, *args, **kwargs):
+        out["F"], G = self._scores(X)
+        if self.min_outfits:
+            out["G"] = G
+
+
+class ElementwiseWardrobeProblem(_WardrobeMixin, ElementwiseProblem):
+
+    """ One-solution-at-a-time version of WardrobeProblem, for pymoo's elementwise runners.
+
+    Only worth it with a parallel runner, e.g.
+    ElementwiseWardrobeProblem(..., elementwise_runner=StarmapParallelization(pool.starmap)); each worker
+    then keeps its own copy of the cache.
+    Args: as WardrobeProblem, plus pymoo Problem keyword arguments (elementwise_runner)
+    """
+
+    def __init__(
+        self, num_tops, num_bottoms, all_clothes_list, cache=None, normalize=None, occasions=None, min_outfits=None,
+        **kwargs
+    ):
+        super().__init__(
+            **self._setup(num_tops, num_bottoms, all_clothes_list, cache, normalize, occasions, min_outfits), **kwargs
+        )
+
+    def _evaluate(self, x, out, *args, **kwargs):
+        F, G = self._scores(x)
+        out["F"] = F[0]
+        if self.min_outfits:
+            out["G"] = G[0]
+
+
+def wardrobe_problem(
+    num_tops, num_bottoms, all_clothes_list, cache=None, normalize=None, occasions=None, min_outfits=None,
+    elementwise_runner=None
+):
+
+    """ The suitcase problem for pymoo: WardrobeProblem, or ElementwiseWardrobeProblem when an elementwise runner is given.
+    Args:
+        num_tops, num_bottoms (int): number of tops and bottoms respectively in original suitcase
+        all_clothes_list (list): List with all original clothing info dictionaries
+        cache (EvaluationCache): Optional, memoizes solutions across generations and runs
+        normalize (list): Optional, list with the max values for each objective present across all solutions
+        occasions (list): Optional, occasion columns whose outfits lost are added as objectives
+        min_outfits (dict): Optional, {occasion column (None for the base case): minimum outfits} constraints
+        elementwise_runner: Optional pymoo elementwise runner (e.g. StarmapParallelization)
+    Returns: pymoo Problem
+    """
+
+    if elementwise_runner is None:
+        return WardrobeProblem(num_tops, num_bottoms, all_clothes_list, cache, normalize, occasions, min_outfits)
+    return ElementwiseWardrobeProblem(
+        num_tops, num_bottoms, all_clothes_list, cache, normalize, occasions, min_outfits,
+        elementwise_runner=elementwise_runner
+    )
@@ -0,0 +1,137 @@
+import numpy as np
+from moo_functions import non_dominated_mask
+
+COLUMNS = ("outfits_lost", "volume", "liking_diff")
+
+
+class QueryEngine:
+
+    """ Epsilon-constraint and range queries over an enumerated objective table, built once.
+
+    The rows are bucketed on a grid over the distinct (outfits_lost, volume) values and, inside each cell, sorted
+    by liking, so every cell keeps its best liking first. A query with bounds on the objectives only visits the
+    grid cells inside the (outfits_lost, volume) box (a few thousand for the 20-item wardrobe, against 2**20 rows)
+    and finds each cell's best liking within the liking bounds with one vectorized binary search. Epsilon-constraint
+    optima and constrained Pareto fronts are then picked among those per-cell bests.
+
+    Bounds are given as {column: (low, high)}, both inclusive, None for an open side, e.g.
+    {"outfits_lost": (None, total_possible_outfits - 25), "volume": (None, 20)}.
+    Rows are positions in the objective table (use .iloc on a DataFrame).
+    Args:
+        objectives: (n, 3) array of outfits_lost, volume, liking (or a DataFrame / SolutionStore with those columns)
+        columns (tuple): names of the three columns; the grid is built over the first two
+    """
+
+    def __init__(self, objectives, columns=COLUMNS):
+        self.columns = tuple(columns)
+        if hasattr(objectives, "header"):
+            objectives = objectives.objectives()
+        elif hasattr(objectives, "columns"):
+            objectives = objectives[list(self.columns)].to_numpy()
+        self.objectives = np.asarray(objectives)
+
+        # distinct values of each objective and every row's rank among them
+        self.values, ranks = [], []
+        for j in range(3):
+            values, rank = np.unique(self.objectives[:, j], return_inverse=True)
+            self.values.append(values)
+            ranks.append(rank.reshape(-1))
+        self.shape = tuple(len(values) for values in self.values)
+        _, n_b, n_l = self.shape
+
+        # rows sorted by grid cell, then liking: key = cell * n_l + liking rank
+        cell = ranks[0].astype(np.int64) * n_b + ranks[1]
+        self.order = np.lexsort((ranks[2], cell))
+        self.keys = (cell * n_l + ranks[2])[self.order]
+
+    def __len__(self):
+        return len(self.objectives)
+
+    def _rank_range(self, j, bounds):
+        # inclusive rank range of column j allowed by bounds (empty when low > high)
+        low, high = (bounds or {}).get(self.columns[j], (None, None))
+        values = self.values[j]
+        lo = 0 if low is None else int(np.searchsorted(values, low, side="left"))
+        hi = len(values) - 1 if high is None else int(np.searchsorted(values, high, side="right")) - 1
+        return lo, hi
+
+    def _cells(self, bounds):
+        # grid cells inside the (outfits_lost, volume) box, and for each the positions (in self.keys) of its first
+        # row within the liking bounds and one past its last
+        (a_lo, a_hi), (b_lo, b_hi), (l_lo, l_hi) = (self._rank_range(j, bounds) for j in range(3))
+        if a_lo > a_hi or b_lo > b_hi or l_lo > l_hi:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        n_b, n_l = self.shape[1], self.shape[2]
+        cells = (np.arange(a_lo, a_hi + 1, dtype=np.int64)[:, None] * n_b + np.arange(b_lo, b_hi + 1)).reshape(-1)
+        first = np.searchsorted(self.keys, cells * n_l + l_lo, side="left")
+        last = np.searchsorted(self.keys, cells * n_l + l_hi, side="right")
+        found = first < last
+        return cells[found], first[found], last[found]
+
+    def _best(self, bounds):
+        # one row per non-empty cell: its best liking within the bounds, as (positions in self.keys, rank matrix)
+        cells, first, _ = self._cells(bounds)
+        n_b, n_l = self.shape[1], self.shape[2]
+        ranks = np.column_stack([cells // n_b, cells % n_b, self.keys[first] - cells * n_l])
+        return first, ranks
+
+    def count(self, bounds=None):
+
+        """ Number of rows within bounds. """
+
+        _, first, last = self._cells(bounds)
+        return int((last - first).sum())
+
+    def rows(self, bounds=None):
+
+        """ All rows within bounds, grouped by (outfits_lost, volume) cell and sorted by liking inside each. """
+
+        _, first, last = self._cells(bounds)
+        if len(first) == 0:
+            return np.zeros(0, dtype=np.int64)
+        lengths = last - first
+        positions = np.arange(lengths.sum()) + np.repeat(first - (np.cumsum(lengths) - lengths), lengths)
+        return self.order[positions]
+
+    def epsilon_constraint(self, objective="liking_diff", bounds=None):
+
+        """ Epsilon-constraint optimum: the row minimizing one objective among the rows within bounds.
+        Ties are broken on the remaining objectives in column order, so the answer is Pareto optimal.
+        Args:
+            objective (str): column to minimize
+            bounds (dict): {column: (low, high)} constraints
+        Returns: row of the optimum, or None if no row satisfies the bounds
+        """
+
+        first, ranks = self._best(bounds)
+        if len(first) == 0:
+            return None
+        k = self.columns.index(objective)
+        tie_breaks = [j for j in range(3) if j != k]
+        best = np.lexsort(tuple(ranks[:, j] for j in reversed(tie_breaks)) + (ranks[:, k],))[0]
+        return int(self.order[first[best]])
+
+    def pareto_front(self, bounds=None, columns=None, all_rows=False):
+
+        """ Pareto front of the rows within bounds, on all three objectives or on a subset of them.
+        Only the per-cell bests can be non-dominated, so at most one row per (outfits_lost, volume) cell is compared.
+        Args:
+            bounds (dict): {column: (low, high)} constraints
+            columns (list): Optional, the objectives the front is taken on (e.g. ["volume", "liking_diff"])
+            all_rows (bool): return every row sharing a front point's full objective vector, not one representative
+        Returns: rows of the front, ordered by outfits_lost, then volume
+        """
+
+        first, ranks = self._best(bounds)
+        on = [self.columns.index(c) for c in (columns or self.columns)]
+        front = non_dominated_mask(ranks[:, on])
+        if not all_rows:
+            return self.order[first[front]]
+
+        # rows with the same objective vector share the same key and are contiguous in self.keys
+        first = first[front]
+        last = np.searchsorted(self.keys, self.keys[first], side="right")
+        lengths = last - first
+        positions = np.arange(lengths.sum()) + np.repeat(first - (np.cumsum(lengths) - lengths), lengths)
+        return self.order[positions]
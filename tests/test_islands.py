@@ -0,0 +1,21 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), os.path.join(ROOT, "src", "algorithms")]
+
+import islands
+from benchmark import synthetic_wardrobe
+
+
+@pytest.mark.parametrize("algorithm", islands.ALGORITHMS)
+def test_every_algorithm_runs_on_islands(algorithm):
+    num_tops, num_bottoms, all_clothes_list = synthetic_wardrobe(12, 0)
+    solutions, objectives = islands.run(
+        algorithm, num_tops, num_bottoms, all_clothes_list, n_islands=2, generations=4, migration_interval=2,
+        n_migrants=2, seed=0, max_workers=1, progress=False
+    )
+    assert len(solutions) == len(objectives) > 0
+    assert np.asarray(solutions).shape[1] == num_tops + num_bottoms
@@ -0,0 +1,29 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), os.path.join(ROOT, "src", "algorithms")]
+
+from moead import MOEAD
+from weights import decomposition
+from benchmark import synthetic_wardrobe
+
+
+def test_neighborhood_is_capped_at_population_size(tmp_path):
+    weights, neighbors = decomposition(10, 3, 20, cache_dir=tmp_path)
+    assert neighbors.shape == (10, 10)
+    assert np.array_equal(np.sort(neighbors, axis=1), np.tile(np.arange(10), (10, 1)))
+    assert os.listdir(tmp_path) == ["weights_das-dennis_N10_M3_T10.npz"]
+
+
+@pytest.mark.parametrize("mode", ["sequential", "batched"])
+def test_neighborhood_larger_than_population(mode):
+    num_tops, num_bottoms, all_clothes_list = synthetic_wardrobe(12, 0)
+    moead = MOEAD(
+        num_tops + num_bottoms, 3, num_tops, num_bottoms, all_clothes_list, population_size=10,
+        neighborhood_size=20, max_generations=3, rng=0
+    )
+    population, objectives = moead.run(mode, progress=False)
+    assert len(population) == len(objectives) == 10
@@ -0,0 +1,88 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), os.path.join(ROOT, "src", "algorithms")]
+
+import moo_functions as moo
+from benchmark import synthetic_wardrobe
+
+
+@pytest.mark.parametrize("n_items, seed", [(12, 0), (20, 1), (33, 2)])
+def test_compiled_wardrobe_matches_reference(n_items, seed):
+    num_tops, num_bottoms, all_clothes_list = synthetic_wardrobe(n_items, seed)
+    wardrobe = moo.compile_wardrobe(num_tops, num_bottoms, all_clothes_list)
+    X = np.random.default_rng(seed).integers(0, 2, size=(50, n_items)).astype(np.uint8)
+    X[0], X[1] = 0, 1
+
+    expected = np.array([
+        moo.evaluate_solution_metrics_reference(x, num_tops, num_bottoms, all_clothes_list) for x in X
+    ])
+    np.testing.assert_array_equal(wardrobe.evaluate_population(X), expected)
+    np.testing.assert_array_equal([wardrobe.evaluate(x) for x in X], expected)
+    np.testing.assert_array_equal(moo.evaluate_population(X, num_tops, num_bottoms, all_clothes_list), expected)
+
+
+def test_compiled_wardrobe_matches_reference_normalized():
+    num_tops, num_bottoms, all_clothes_list = synthetic_wardrobe(20, 3)
+    wardrobe = moo.compile_wardrobe(num_tops, num_bottoms, all_clothes_list)
+    X = np.random.default_rng(3).integers(0, 2, size=(50, 20)).astype(np.uint8)
+    normalize = [40, 50, 30]
+
+    expected = np.array([
+        moo.evaluate_solution_metrics_reference(x, num_tops, num_bottoms, all_clothes_list, normalize) for x in X
+    ])
+    np.testing.assert_allclose(wardrobe.evaluate_population(X, normalize), expected)
+    np.testing.assert_allclose([wardrobe.evaluate(x, normalize) for x in X], expected)
+
+
+@pytest.mark.parametrize("n_flips", [1, 2, 3])
+def test_delta_evaluation_matches_full_evaluation(n_flips):
+    num_tops, num_bottoms, all_clothes_list = synthetic_wardrobe(40, 4)
+    wardrobe = moo.compile_wardrobe(num_tops, num_bottoms, all_clothes_list)
+    rng = np.random.default_rng(n_flips)
+    parents = rng.integers(0, 2, size=(100, 40)).astype(np.uint8)
+    flipped = np.array([rng.choice(40, size=n_flips, replace=False) for _ in range(len(parents))])
+    children = parents.copy()
+    np.put_along_axis(children, flipped, 1 - np.take_along_axis(parents, flipped, axis=1), axis=1)
+    parent_objectives = wardrobe.evaluate_population(parents)
+    expected = wardrobe.evaluate_population(children)
+
+    np.testing.assert_array_equal(wardrobe.evaluate_children(parents, parent_objectives, children), expected)
+    np.testing.assert_array_equal(
+        [wardrobe.evaluate_delta(p, tuple(f), i) for p, f, i in zip(parents, parent_objectives.tolist(), flipped)],
+        expected,
+    )
+    normalize = [40, 50, 30]
+    np.testing.assert_allclose(
+        wardrobe.evaluate_children(parents, parent_objectives, children, normalize),
+        wardrobe.evaluate_population(children, normalize),
+    )
+
+
+def test_occasion_columns_match_total_outfits():
+    num_tops, num_bottoms, all_clothes_list = synthetic_wardrobe(20, 5)
+    occasions = moo.occasion_columns(all_clothes_list)
+    assert occasions == ["Pajamas?"]
+    X = np.random.default_rng(5).integers(0, 2, size=(40, 20)).astype(np.uint8)
+    X[0] = 1
+
+    expected = []
+    for x in X:
+        tops, bottoms = moo.convert_binary_array_to_item_dicts(x, num_tops, num_bottoms, all_clothes_list)
+        row = []
+        for occasion in [None] + occasions:
+            total = moo.total_outfits(all_clothes_list[:num_tops], all_clothes_list[num_tops:], occasion)
+            row.append(total - moo.total_outfits(tops, bottoms, occasion))
+        expected.append(row)
+    expected = np.array(expected)
+
+    F = moo.evaluate_population(X, num_tops, num_bottoms, all_clothes_list, occasions=occasions)
+    np.testing.assert_array_equal(F[:, [0, 3]], expected)
+    np.testing.assert_array_equal(
+        [moo.evaluate_solution_metrics(x, num_tops, num_bottoms, all_clothes_list, occasions=occasions) for x in X], F
+    )
+    wardrobe = moo.compile_wardrobe(num_tops, num_bottoms, all_clothes_list)
+    np.testing.assert_array_equal(wardrobe.outfits_lost(X, [None] + occasions), expected)
@@ -0,0 +1,38 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), os.path.join(ROOT, "src", "algorithms")]
+
+import moo_functions as moo
+import nsga2
+from benchmark import synthetic_wardrobe
+
+
+def custom_metrics(array, num_tops, num_bottoms, all_clothes_list):
+    return moo.evaluate_solution_metrics(array, num_tops, num_bottoms, all_clothes_list)
+
+
+@pytest.mark.parametrize("option", ["cache", "occasions", "min_outfits"])
+def test_custom_metrics_reject_stock_only_options(option):
+    num_tops, num_bottoms, all_clothes_list = synthetic_wardrobe(12, 0)
+    option = dict(
+        cache=dict(cache=moo.EvaluationCache(num_tops, num_bottoms, all_clothes_list)),
+        occasions=dict(occasions=["Pajamas?"]),
+        min_outfits=dict(min_outfits={None: 5}),
+    )[option]
+    with pytest.raises(ValueError):
+        nsga2.run(
+            custom_metrics, num_tops, num_bottoms, all_clothes_list, num_tops + num_bottoms, pop_size=10,
+            generations=2, progress=False, rng=0, **option
+        )
+
+
+def test_custom_metrics_run():
+    num_tops, num_bottoms, all_clothes_list = synthetic_wardrobe(12, 0)
+    population, objectives = nsga2.run(
+        custom_metrics, num_tops, num_bottoms, all_clothes_list, num_tops + num_bottoms, pop_size=10,
+        generations=2, progress=False, rng=0
+    )
+    assert len(population) == len(objectives) == 10
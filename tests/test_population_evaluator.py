@@ -0,0 +1,40 @@
+import os
+import sys
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), os.path.join(ROOT, "src", "algorithms")]
+
+import moo_functions as moo
+from benchmark import synthetic_wardrobe
+from population import bit_flip_mutation
+
+
+def test_parents_with_min_outfits_match_full_evaluation():
+    # infeasible parents carry penalized objectives, so children must not be scored from them incrementally
+    num_tops, num_bottoms, all_clothes_list = synthetic_wardrobe(60, 3)
+    assert num_tops + num_bottoms >= moo.DELTA_EVALUATION_MIN_ITEMS
+    min_outfits = {None: 220}
+    evaluate = moo.population_evaluator(num_tops, num_bottoms, all_clothes_list, min_outfits=min_outfits)
+    reference = moo.population_evaluator(num_tops, num_bottoms, all_clothes_list, min_outfits=min_outfits)
+
+    rng = np.random.default_rng(0)
+    parents = rng.integers(0, 2, size=(200, num_tops + num_bottoms)).astype(np.uint8)
+    parent_objectives = evaluate(parents)
+    children = bit_flip_mutation(parents, 2 / parents.shape[1], rng)
+
+    np.testing.assert_array_equal(evaluate(children, parents, parent_objectives), reference(children))
+
+
+def test_incremental_scores_match_full_evaluation():
+    num_tops, num_bottoms, all_clothes_list = synthetic_wardrobe(60, 3)
+    evaluate = moo.population_evaluator(num_tops, num_bottoms, all_clothes_list)
+
+    rng = np.random.default_rng(1)
+    parents = rng.integers(0, 2, size=(200, num_tops + num_bottoms)).astype(np.uint8)
+    children = bit_flip_mutation(parents, 2 / parents.shape[1], rng)
+
+    np.testing.assert_array_equal(
+        evaluate(children, parents, evaluate(parents)),
+        moo.evaluate_population(children, num_tops, num_bottoms, all_clothes_list),
+    )
@@ -0,0 +1,35 @@
+import os
+import sys
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), os.path.join(ROOT, "src", "algorithms")]
+
+import replicates
+from islands import ALGORITHMS
+from benchmark import synthetic_wardrobe
+
+
+def _run(configurations, seed):
+    num_tops, num_bottoms, all_clothes_list = synthetic_wardrobe(12, 0)
+    return replicates.run(
+        configurations, num_tops, num_bottoms, all_clothes_list, replicates=2, generations=3, seed=seed,
+        max_workers=1, progress=False
+    )
+
+
+def test_algorithm_names_run_with_default_arguments():
+    results = _run(list(ALGORITHMS), seed=0)
+    assert sorted(results["configuration"].unique()) == sorted(ALGORITHMS)
+    assert (results["n_nondominated"] > 0).all()
+    assert (results["hypervolume"] > 0).all()
+
+
+def test_same_seed_gives_same_results():
+    configurations = {
+        "nsga2": dict(algorithm="nsga2", pop_size=20),
+        "moead": dict(algorithm="moead", population_size=20, neighborhood_size=5),
+    }
+    first, second = (_run(configurations, seed=7).drop(columns="wall_time") for _ in range(2))
+    pd.testing.assert_frame_equal(first, second)
+    assert not first.equals(_run(configurations, seed=8).drop(columns="wall_time"))
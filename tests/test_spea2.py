@@ -0,0 +1,32 @@
+import os
+import sys
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), os.path.join(ROOT, "src", "algorithms")]
+
+from spea2 import truncate_archive
+
+
+def brute_force_truncation(objectives, archive_size):
+    # the textbook SPEA2 truncation: recompute every member's sorted distance list at each removal and drop
+    # the lexicographically smallest, the lowest index among exact ties
+    F = np.asarray(objectives, dtype=float)
+    dist = np.sqrt(((F[:, None, :] - F[None, :, :]) ** 2).sum(axis=2))
+    alive = list(range(len(F)))
+    while len(alive) > archive_size:
+        victim = min(alive, key=lambda i: (sorted(dist[i, j] for j in alive if j != i), i))
+        alive.remove(victim)
+    return np.array(alive)
+
+
+def test_truncation_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        n = int(rng.integers(2, 25))
+        # a small value range gives plenty of duplicates and distance ties
+        objectives = rng.integers(0, 6, size=(n, int(rng.integers(2, 4))))
+        archive_size = int(rng.integers(1, n + 1))
+        np.testing.assert_array_equal(
+            truncate_archive(objectives, archive_size), brute_force_truncation(objectives, archive_size)
+        )